@@ -89,20 +89,9 @@ class PSUController(Controller):
         # e.g. chan 1 2V 1A chan 2 2V 0A etc.... in one line. 
         try:
             puts(f"Printing every channel status for {device._model}. Press ctrl-c to stop")
-            chan_dict = {
-                chan: { 
-                    "volage": 0, 
-                    "current": 0, 
-                    "enabled": False
-                } for chan in device.channels
-            }
-
             while True:
-                # Update info
-                for chan, status_dict in chan_dict.items():
-                    status_dict["voltage"] = device.get_voltage(chan)
-                    status_dict["current"] = device.get_current(chan)
-                    status_dict["enabled"] = device.is_switched_on(chan)
+                # Update info, one snapshot per refresh
+                chan_dict = device.snapshot()
                 # Print info
                 for chan, status_dict in chan_dict.items():
                     chan_str = colored.green(f"Chan {chan}\t") if status_dict["enabled"] else colored.red(f"Chan {chan}\t")
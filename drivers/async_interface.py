@@ -0,0 +1,132 @@
+import asyncio
+from .command_queue import get_command_queue, PRIORITY_NORMAL
+
+
+class AsyncInterfaceMixin:
+    """
+    Thread safe and asyncio front end for the blocking instrument I/O.
+    Operations are run by the instrument's CommandQueue, so calls to one
+    resource stay serialised while different instruments are driven
+    concurrently, e.g.
+
+        await asyncio.gather(psu.aget_voltage(1), dmm.aget_voltage_dc(3), load.aget_current_load())
+
+    takes as long as the slowest instrument instead of the sum of all three.
+    Every call accepts priority=, e.g. aswitch_off(1, priority=PRIORITY_SAFETY).
+
+    Plain calls such as psu.get_voltage(1) from any thread are serialised with
+    the queue too: the drivers' I/O primitives and compound operations are
+    decorated with serialised(), see command_queue.
+    """
+
+    def _command_queue_key(self):
+        # Overridden where instruments share a resource, see BaseInterface.
+        return id(self)
+
+    def submit(self, func, *args, priority=PRIORITY_NORMAL, **kwargs):
+        """
+        Queues a driver method (or its name, or any callable) to run atomically
+        on this instrument's command queue. Returns a concurrent.futures.Future.
+        """
+        if isinstance(func, str):
+            func = getattr(self, func)
+        return get_command_queue(self._command_queue_key()).submit(
+            func, *args, priority=priority, **kwargs
+        )
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    async def acall(self, method_name, *args, **kwargs):
+        """Runs any blocking driver method, e.g. await dev.acall('set_local')."""
+        return await self._run_blocking(getattr(self, method_name), *args, **kwargs)
+
+    async def aquery(self, *args, **kwargs):
+        return await self._run_blocking(self._query, *args, **kwargs)
+
+    async def awrite(self, *args, **kwargs):
+        return await self._run_blocking(self._write, *args, **kwargs)
+
+
+# The *BaseMixin classes only wrap the methods the virtual instruments
+# implement too, the hardware driver interfaces use the full mixins.
+
+class AsyncPSUBaseMixin(AsyncInterfaceMixin):
+    async def aget_voltage(self, *args, **kwargs):
+        return await self._run_blocking(self.get_voltage, *args, **kwargs)
+
+    async def aget_current(self, *args, **kwargs):
+        return await self._run_blocking(self.get_current, *args, **kwargs)
+
+    async def aquery_set_voltage(self, *args, **kwargs):
+        return await self._run_blocking(self.query_set_voltage, *args, **kwargs)
+
+    async def aquery_set_current(self, *args, **kwargs):
+        return await self._run_blocking(self.query_set_current, *args, **kwargs)
+
+    async def aset_voltage(self, *args, **kwargs):
+        return await self._run_blocking(self.set_voltage, *args, **kwargs)
+
+    async def aset_current(self, *args, **kwargs):
+        return await self._run_blocking(self.set_current, *args, **kwargs)
+
+    async def aswitch_on(self, *args, **kwargs):
+        return await self._run_blocking(self.switch_on, *args, **kwargs)
+
+    async def aswitch_off(self, *args, **kwargs):
+        return await self._run_blocking(self.switch_off, *args, **kwargs)
+
+
+class AsyncPSUMixin(AsyncPSUBaseMixin):
+    async def ais_switched_on(self, *args, **kwargs):
+        return await self._run_blocking(self.is_switched_on, *args, **kwargs)
+
+    async def asnapshot(self, *args, **kwargs):
+        return await self._run_blocking(self.snapshot, *args, **kwargs)
+
+
+class AsyncDMMBaseMixin(AsyncInterfaceMixin):
+    async def aget_voltage_dc(self, *args, **kwargs):
+        return await self._run_blocking(self.get_voltage_dc, *args, **kwargs)
+
+    async def aget_voltage_ac(self, *args, **kwargs):
+        return await self._run_blocking(self.get_voltage_ac, *args, **kwargs)
+
+    async def aget_impedance(self, *args, **kwargs):
+        return await self._run_blocking(self.get_impedance, *args, **kwargs)
+
+
+class AsyncDMMMixin(AsyncDMMBaseMixin):
+    async def aget_temperature(self, *args, **kwargs):
+        return await self._run_blocking(self.get_temperature, *args, **kwargs)
+
+    async def aget_current(self, *args, **kwargs):
+        return await self._run_blocking(self.get_current, *args, **kwargs)
+
+    async def ascan(self, *args, **kwargs):
+        return await self._run_blocking(self.scan, *args, **kwargs)
+
+
+class AsyncLoadBaseMixin(AsyncInterfaceMixin):
+    async def aset_level(self, *args, **kwargs):
+        return await self._run_blocking(self.set_level, *args, **kwargs)
+
+    async def aget_current_load(self, *args, **kwargs):
+        return await self._run_blocking(self.get_current_load, *args, **kwargs)
+
+    async def aget_voltage_load(self, *args, **kwargs):
+        return await self._run_blocking(self.get_voltage_load, *args, **kwargs)
+
+    async def aswitch_on(self, *args, **kwargs):
+        return await self._run_blocking(self.switch_on, *args, **kwargs)
+
+    async def aswitch_off(self, *args, **kwargs):
+        return await self._run_blocking(self.switch_off, *args, **kwargs)
+
+
+class AsyncLoadMixin(AsyncLoadBaseMixin):
+    async def aset_current_load(self, *args, **kwargs):
+        return await self._run_blocking(self.set_current_load, *args, **kwargs)
+
+    async def aset_voltage_load(self, *args, **kwargs):
+        return await self._run_blocking(self.set_voltage_load, *args, **kwargs)
@@ -1,9 +1,12 @@
 
 from .common.scpi_commands import SCPI_IDENTIFY
 from .common.errors import VisaIOError
-import re
+from .common.response_parser import parse_float
+from .resource_pool import RESOURCE_POOL
+from .async_interface import AsyncInterfaceMixin
+from .command_queue import serialised
 
-class BaseInterface:
+class BaseInterface(AsyncInterfaceMixin):
     _model = "NOTSET"
     channels = []
     def __str__(self):
@@ -12,21 +15,33 @@ class BaseInterface:
     def __init__(self, **kwargs):
         self.resource = kwargs.pop('resource', None)
         self.serial_id = kwargs.pop('serial_id', None)
+        # Open by name through the shared pool if no session was given.
+        resource_name = kwargs.pop('resource_name', None)
+        if self.resource is None and resource_name is not None:
+            self.resource = RESOURCE_POOL.acquire(resource_name)
+
+    def close(self):
+        """Hands the session back to the shared resource pool."""
+        if self.resource is not None:
+            RESOURCE_POOL.release(self.resource.resource_name)
+            self.resource = None
     
+    def _command_queue_key(self):
+        # One queue per VISA resource, shared by every driver object using it.
+        if self.resource is not None:
+            return self.resource.resource_name
+        return id(self)
+
     def response_to_float(self, response):
-        value = re.findall("\d+\.\d+", response)
-        if len(value) > 1:
-            raise ValueError("More than one float found")
         try:
-            return float(value[0])
-        except ValueError:            
-            # With a regex this is probably unnecessary. 
+            return parse_float(response)
+        except ValueError:
             raise IOError(
-                f"Error: {self.__name__} encountered an unknown value" +
-                f"to parse: {value}"
+                f"Error: {self._model} encountered an unknown value " +
+                f"to parse: {response}"
             )
 
-
+    @serialised
     def _query(self, _str):        
         try:
             return self.resource.query(_str)
@@ -35,6 +50,18 @@ class BaseInterface:
                 f"Error: {self._model}:{self.serial_id} Query [{_str}] timed out"
             )
 
+    @serialised
+    def _query_binary(self, _str, datatype='f', is_big_endian=False, container=list):
+        try:
+            return self.resource.query_binary_values(
+                _str, datatype=datatype, is_big_endian=is_big_endian, container=container
+            )
+        except VisaIOError:
+            raise IOError(
+                f"Error: {self._model}:{self.serial_id} Query [{_str}] timed out"
+            )
+
+    @serialised
     def _write(self, _str):
         try:
             return self.resource.write(_str)
@@ -0,0 +1,228 @@
+import json
+import os
+import time
+import numpy
+
+# Every store is a directory holding metadata.json plus one append-only raw
+# little-endian file per column. Appending never rewrites earlier data, the
+# number of rows is derived from the file sizes, and readers memory-map the
+# files so a single column or time window can be read without loading the rest.
+METADATA_FILE = 'metadata.json'
+
+# Per capture index record of a waveform channel.
+WAVEFORM_INDEX_DTYPE = numpy.dtype([
+    ('start', '<i8'),       # first sample in the channel's data file
+    ('length', '<i8'),      # number of samples
+    ('t0', '<f8'),          # time of the first sample, from get_time_axis()
+    ('dt', '<f8'),          # sample interval
+    ('range', '<f8'),       # channel range (V)
+    ('offset', '<f8'),      # channel offset (V)
+    ('overflow', '?'),
+    ('timestamp', '<f8'),   # time.time() when the capture was stored
+])
+
+
+def _write_metadata(path, metadata):
+    tmp_path = os.path.join(path, METADATA_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(metadata, f, indent=4)
+    os.replace(tmp_path, os.path.join(path, METADATA_FILE))
+
+
+def _read_metadata(path):
+    with open(os.path.join(path, METADATA_FILE), 'r') as f:
+        return json.load(f)
+
+
+def _memmap(file_path, dtype):
+    dtype = numpy.dtype(dtype)
+    size = os.path.getsize(file_path) // dtype.itemsize if os.path.exists(file_path) else 0
+    if size == 0:
+        return numpy.empty(0, dtype=dtype)
+    return numpy.memmap(file_path, dtype=dtype, mode='r', shape=(size,))
+
+
+class MeasurementWriter:
+    """
+    Streams batches of timestamped readings (e.g. TelemetryLogger.read_since()
+    output) to disk, one column file per channel.
+    """
+    def __init__(self, path, columns, dtype='<f8'):
+        self.path = path
+        self.columns = list(columns)
+        self.dtype = numpy.dtype(dtype)
+        os.makedirs(path, exist_ok=True)
+        metadata_path = os.path.join(path, METADATA_FILE)
+        if os.path.exists(metadata_path):
+            metadata = _read_metadata(path)
+            if metadata.get('type') != 'measurements' or metadata['columns'] != self.columns:
+                raise ValueError(f"{path} holds a different store layout")
+            if numpy.dtype(metadata['dtype']) != self.dtype:
+                raise ValueError(f"{path} stores {metadata['dtype']} values, not {self.dtype.str}")
+        else:
+            _write_metadata(path, {
+                'type': 'measurements',
+                'columns': self.columns,
+                'dtype': self.dtype.str,
+            })
+        self._timestamp_file = open(os.path.join(path, 'timestamp.bin'), 'ab')
+        self._column_files = [
+            open(os.path.join(path, f'column_{i}.bin'), 'ab') for i in range(len(self.columns))
+        ]
+
+    def append(self, timestamps, values):
+        """timestamps: (n,) array, values: (n, columns) array."""
+        timestamps = numpy.asarray(timestamps, dtype='<f8')
+        values = numpy.asarray(values).reshape(len(timestamps), len(self.columns))
+        for i, f in enumerate(self._column_files):
+            numpy.ascontiguousarray(values[:, i], dtype=self.dtype).tofile(f)
+            f.flush()
+        # Timestamps last, readers use their count as the number of complete rows.
+        timestamps.tofile(self._timestamp_file)
+        self._timestamp_file.flush()
+
+    def close(self):
+        for f in [self._timestamp_file] + self._column_files:
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MeasurementReader:
+    def __init__(self, path):
+        self.path = path
+        metadata = _read_metadata(path)
+        self.columns = metadata['columns']
+        self.dtype = numpy.dtype(metadata['dtype'])
+
+    def __len__(self):
+        return len(self.timestamps())
+
+    def timestamps(self):
+        return _memmap(os.path.join(self.path, 'timestamp.bin'), '<f8')
+
+    def column(self, name):
+        """Memory-mapped values of one column."""
+        values = _memmap(os.path.join(self.path, f'column_{self.columns.index(name)}.bin'), self.dtype)
+        return values[:len(self)]
+
+    def window(self, start_time=None, end_time=None, columns=None):
+        """
+        Returns (timestamps, {column: values}) for start_time <= t < end_time.
+        Timestamps are assumed to be increasing (monotonic clock).
+        """
+        timestamps = self.timestamps()
+        first = 0 if start_time is None else numpy.searchsorted(timestamps, start_time, side='left')
+        last = len(timestamps) if end_time is None else numpy.searchsorted(timestamps, end_time, side='left')
+        columns = self.columns if columns is None else columns
+        return (timestamps[first:last],
+                {name: self.column(name)[first:last] for name in columns})
+
+
+class WaveformWriter:
+    """
+    Streams scope captures to disk. Each channel has a raw sample file plus an
+    index of WAVEFORM_INDEX_DTYPE records describing each capture, e.g.
+
+        data, overflow = scope.fetch(chan='A')
+        writer.append('A', data, scope.get_time_axis(), rng=ch.rng_volt,
+                      offset=ch.offset, overflow=overflow)
+    """
+    def __init__(self, path, dtype='<f4'):
+        self.path = path
+        self.dtype = numpy.dtype(dtype)
+        os.makedirs(path, exist_ok=True)
+        metadata_path = os.path.join(path, METADATA_FILE)
+        if os.path.exists(metadata_path):
+            metadata = _read_metadata(path)
+            if metadata.get('type') != 'waveforms':
+                raise ValueError(f"{path} holds a different store layout")
+            if numpy.dtype(metadata['dtype']) != self.dtype:
+                raise ValueError(f"{path} stores {metadata['dtype']} samples, not {self.dtype.str}")
+            self._channels = metadata['channels']
+        else:
+            self._channels = []
+            self._save_metadata()
+        self._files = {}
+
+    def _save_metadata(self):
+        _write_metadata(self.path, {
+            'type': 'waveforms',
+            'dtype': self.dtype.str,
+            'channels': self._channels,
+        })
+
+    def _open(self, chan):
+        chan = str(chan)
+        if chan not in self._files:
+            if chan not in self._channels:
+                self._channels.append(chan)
+                self._save_metadata()
+            idx = self._channels.index(chan)
+            data_file = open(os.path.join(self.path, f'channel_{idx}.bin'), 'ab')
+            index_file = open(os.path.join(self.path, f'channel_{idx}.index'), 'ab')
+            self._files[chan] = (data_file, index_file)
+        return self._files[chan]
+
+    def append(self, chan, data, time_axis, rng=float('nan'), offset=0.0, overflow=False):
+        data_file, index_file = self._open(chan)
+        data = numpy.asarray(data)
+        start = data_file.tell() // self.dtype.itemsize
+        numpy.ascontiguousarray(data, dtype=self.dtype).tofile(data_file)
+        data_file.flush()
+
+        # Store the (linear) time axis as first sample time + interval only.
+        t0 = float(time_axis[0]) if len(time_axis) else 0.0
+        dt = float(time_axis[1] - time_axis[0]) if len(time_axis) > 1 else 0.0
+        record = numpy.array([(start, len(data), t0, dt, rng, offset, bool(overflow), time.time())],
+                             dtype=WAVEFORM_INDEX_DTYPE)
+        # Index record last, a capture is only visible once it is complete.
+        record.tofile(index_file)
+        index_file.flush()
+
+    def close(self):
+        for data_file, index_file in self._files.values():
+            data_file.close()
+            index_file.close()
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class WaveformReader:
+    def __init__(self, path):
+        self.path = path
+        metadata = _read_metadata(path)
+        self.dtype = numpy.dtype(metadata['dtype'])
+        self.channels = metadata['channels']
+
+    def index(self, chan):
+        """Memory-mapped WAVEFORM_INDEX_DTYPE records of every capture of chan."""
+        idx = self.channels.index(str(chan))
+        return _memmap(os.path.join(self.path, f'channel_{idx}.index'), WAVEFORM_INDEX_DTYPE)
+
+    def captures(self, chan):
+        return len(self.index(chan))
+
+    def capture(self, chan, n, first_sample=0, last_sample=None):
+        """
+        Returns (time_axis, data) of capture n of chan, optionally only the
+        samples first_sample..last_sample. data is a memory-mapped view.
+        """
+        record = self.index(chan)[n]
+        idx = self.channels.index(str(chan))
+        samples = _memmap(os.path.join(self.path, f'channel_{idx}.bin'), self.dtype)
+        length = int(record['length'])
+        last_sample = length if last_sample is None else min(last_sample, length)
+        start = int(record['start'])
+        data = samples[start + first_sample:start + last_sample]
+        time_axis = record['t0'] + record['dt'] * numpy.arange(first_sample, last_sample)
+        return time_axis, data
@@ -0,0 +1,108 @@
+import functools
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+
+# Lower number runs first.
+PRIORITY_SAFETY = 0
+PRIORITY_INTERACTIVE = 10
+PRIORITY_NORMAL = 50
+PRIORITY_BULK = 100
+
+# Seconds an idle worker thread waits before exiting, it restarts on the next submit.
+WORKER_IDLE_TIMEOUT = 5
+
+
+class CommandQueue:
+    """
+    Serialises every operation on one resource through a single worker thread.
+    Any callable can be submitted, so compound operations such as select
+    channel + measure (e.g. a whole PSUInterfaceHMP4030.get_voltage call) run
+    atomically even when many threads share the instrument. Pending commands
+    run by priority, then in submission order.
+
+    The worker holds lock while running a command. Driver methods called
+    directly (not through submit()) take the same lock, see serialised(), so
+    they never interleave with queued work on the same resource.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.RLock()
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, func, *args, priority=PRIORITY_NORMAL, **kwargs):
+        """Queues func(*args, **kwargs) and returns a concurrent.futures.Future."""
+        future = Future()
+        with self._lock:
+            # The sequence number keeps FIFO order within a priority and
+            # stops the tuple comparison from ever reaching the Future.
+            self._queue.put((priority, next(self._seq), future, functools.partial(func, *args, **kwargs)))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._worker, name=f"{self.name}-commands", daemon=True
+                )
+                self._thread.start()
+        return future
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _worker(self):
+        while True:
+            try:
+                _, _, future, call = self._queue.get(timeout=WORKER_IDLE_TIMEOUT)
+            except queue.Empty:
+                with self._lock:
+                    # submit() holds the lock while queueing, so nothing can
+                    # slip in between this check and the thread exiting.
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with self.lock:
+                    result = call()
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_command_queue(key):
+    """Returns the command queue of a resource, creating it on first use."""
+    # Lookups of existing queues (every serialised() call) skip the lock,
+    # only creating a queue has to be atomic.
+    command_queue = _queues.get(key)
+    if command_queue is not None:
+        return command_queue
+    with _queues_lock:
+        command_queue = _queues.get(key)
+        if command_queue is None:
+            command_queue = CommandQueue(str(key))
+            _queues[key] = command_queue
+        return command_queue
+
+
+def serialised(method):
+    """
+    Makes a driver method hold its resource's CommandQueue.lock while it
+    runs, so a compound operation (e.g. select output + measure) called
+    directly from one thread is atomic against queued and other direct calls.
+    Applied to the I/O primitives (_query(), _write(), ...) and to every
+    driver method that needs several of them to run back to back.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with get_command_queue(self._command_queue_key()).lock:
+            return method(self, *args, **kwargs)
+    return wrapper
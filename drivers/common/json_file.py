@@ -0,0 +1,27 @@
+import json
+import os
+
+# Small per-user JSON files (scan caches, statistics). Losing one only costs a
+# slower scan, so read and write failures are never raised.
+
+
+def default_json_path(env_var, file_name):
+    """~/file_name unless the env_var environment variable names another file."""
+    return os.environ.get(env_var, os.path.join(os.path.expanduser('~'), file_name))
+
+
+def load_json_file(path):
+    """Returns the file contents, {} if it is missing or corrupt."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_json_file(path, data, description):
+    try:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=4)
+    except OSError as err:
+        print(f"Could not write {description} {path}: {err}")
@@ -0,0 +1,60 @@
+import string
+from array import array
+
+# Characters allowed around the number: unit suffixes such as "V", "VDC", "OHM"
+# and whitespace/line endings.
+_SUFFIX_CHARS = string.ascii_letters + '% \t\r\n'
+
+
+def parse_float(response):
+    """
+    Parses a single numeric instrument reply to float, e.g.
+    '12.000', '12.000V', 'V1 12.000', '-1.2E-3', '+1.234VDC'.
+    Raises ValueError if the reply is not a single number.
+    """
+    value = response.strip()
+    if value[:1].isalpha():
+        # TTi style header, e.g. 'V1 12.000'
+        value = value.partition(' ')[2]
+    try:
+        # rstrip() keeps the exponent as it always ends with a digit.
+        return float(value.rstrip(_SUFFIX_CHARS))
+    except ValueError:
+        raise ValueError(f"Could not parse numeric reply: {response!r}")
+
+
+def parse_floats(response, out=None, separator=','):
+    """
+    Parses a separated multi-value reply (e.g. '+1.0VDC,+2.0VDC') into out,
+    which can be a preallocated array('d')/NumPy buffer with at least as
+    many items as values. Without out a new array('d') is returned.
+    Returns out (or the new array).
+    """
+    values = response.strip().split(separator)
+    if out is None:
+        out = array('d', bytes(8 * len(values)))
+    elif len(out) < len(values):
+        raise ValueError(f"Output buffer too small: {len(out)} < {len(values)}")
+    for i, value in enumerate(values):
+        out[i] = parse_float(value)
+    return out
+
+
+def _benchmark(repeat=100000):
+    # python -m drivers.common.response_parser
+    import re
+    import timeit
+    replies = ['12.000', 'V1 12.000', '0.100A', '+1.234E-03VDC']
+    for reply in replies:
+        # What BaseInterface.response_to_float used to do per reply
+        old = timeit.timeit(lambda: float(re.findall(r"\d+\.\d+", reply)[0]), number=repeat)
+        new = timeit.timeit(lambda: parse_float(reply), number=repeat)
+        print(f"{reply!r:>18}: findall {old * 1e6 / repeat:.2f} us, parse_float {new * 1e6 / repeat:.2f} us")
+    reply = ','.join(['+1.234567E+00VDC'] * 100)
+    buffer = array('d', bytes(8 * 100))
+    new = timeit.timeit(lambda: parse_floats(reply, out=buffer), number=repeat // 100)
+    print(f"100 value batch: parse_floats {new * 1e6 / (repeat // 100):.2f} us")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,276 @@
+import numpy
+
+# Vectorised measurements on scope captures, e.g.
+#
+#     data, overflow = scope.fetch(chan='A')
+#     t = scope.get_time_axis()
+#     stats = statistics(data)
+#     period, frequency, duty = period_duty(data, level=1.65, hysteresis=0.1, time_axis=t)
+#
+# data can be anything numpy.asarray() accepts: Picoscope.fetch()/ChannelInfo.get_data() arrays (volts or raw
+# counts), the list returned by VirtualScopeInterface.fetch(), or a (captures x samples) array such as
+# Picoscope.capture_many() data. 2-D input is measured per capture along the last axis; functions returning a
+# variable number of values per capture then return a list with one array per capture.
+#
+# Positions are fractional sample indices, converted to times when a (linear) time_axis is given.
+
+DIRECTIONS = ('rising', 'falling', 'both')
+
+
+def _as_2d(data):
+    data = numpy.asarray(data)
+    if data.ndim not in (1, 2):
+        raise ValueError(f"Expected a 1-D capture or a 2-D array of captures, got {data.ndim} dimensions")
+    return data.reshape(-1, data.shape[-1])
+
+
+def _to_time(positions, time_axis):
+    if time_axis is None:
+        return positions
+    positions *= time_axis[1] - time_axis[0]
+    positions += time_axis[0]
+    return positions
+
+
+def _sample_interval(time_axis):
+    return 1.0 if time_axis is None else float(time_axis[1] - time_axis[0])
+
+
+def _per_capture(data, values):
+    """Returns values unchanged for a 1-D capture, the single row of a 2-D result otherwise."""
+    return values[0] if numpy.ndim(data) == 1 else values
+
+
+def statistics(data):
+    """
+    Returns {'min', 'max', 'pk_pk', 'mean', 'rms', 'ac_rms'}, floats for one
+    capture or arrays with one value per capture. Reductions only, the
+    samples are never copied (RMS is a dot product instead of data ** 2).
+    """
+    data2d = _as_2d(data)
+    n = data2d.shape[-1]
+    minimum = data2d.min(axis=-1).astype(numpy.float64)
+    maximum = data2d.max(axis=-1).astype(numpy.float64)
+    mean = data2d.mean(axis=-1, dtype=numpy.float64)
+    mean_square = numpy.einsum('ij,ij->i', data2d, data2d, dtype=numpy.float64) / n
+    result = {
+        'min': minimum,
+        'max': maximum,
+        'pk_pk': maximum - minimum,
+        'mean': mean,
+        'rms': numpy.sqrt(mean_square),
+        # rounding can make the difference slightly negative for a DC signal
+        'ac_rms': numpy.sqrt(numpy.maximum(mean_square - mean * mean, 0.0)),
+    }
+    if numpy.ndim(data) == 1:
+        return {key: float(value[0]) for key, value in result.items()}
+    return result
+
+
+def _level_transitions(data2d, level, direction):
+    # (capture, index of the first sample past the level) of every crossing
+    above = data2d >= level
+    if direction == 'rising':
+        flags = numpy.greater(above[:, 1:], above[:, :-1])
+    elif direction == 'falling':
+        flags = numpy.less(above[:, 1:], above[:, :-1])
+    else:
+        flags = numpy.not_equal(above[:, 1:], above[:, :-1])
+    captures, indices = numpy.nonzero(flags)
+    indices += 1
+    return captures, indices
+
+
+def _hysteresis_transitions(data2d, level, direction, hysteresis):
+    # Schmitt trigger: the state only changes once the signal got past level +- hysteresis / 2, every such change
+    # is then placed at the last plain level crossing before it.
+    state = numpy.full(data2d.shape, -1, dtype=numpy.int8)
+    state[data2d <= level - hysteresis / 2] = 0
+    state[data2d >= level + hysteresis / 2] = 1
+    # only the first sample of each run of a state matters
+    run_start = numpy.empty(data2d.shape, dtype=bool)
+    run_start[:, 0] = True
+    numpy.not_equal(state[:, 1:], state[:, :-1], out=run_start[:, 1:])
+    run_start &= state >= 0
+    event_captures, event_indices = numpy.nonzero(run_start)
+    event_states = state[event_captures, event_indices]
+    del state, run_start
+    changed = event_states[1:] != event_states[:-1]
+    changed &= event_captures[1:] == event_captures[:-1]
+    if direction == 'rising':
+        changed &= event_states[1:] == 1
+    elif direction == 'falling':
+        changed &= event_states[1:] == 0
+    switch = numpy.flatnonzero(changed) + 1
+
+    n = data2d.shape[-1]
+    captures, indices = _level_transitions(data2d, level, direction)
+    candidates = captures * n + indices
+    last = numpy.searchsorted(candidates, event_captures[switch] * n + event_indices[switch], side='right') - 1
+    return captures[last], indices[last]
+
+
+def crossings(data, level, direction='rising', hysteresis=0.0, time_axis=None):
+    """
+    Edge detection: positions where data crosses level, linearly
+    interpolated between the two samples around each crossing.
+
+    direction is 'rising', 'falling' or 'both'. A non-zero hysteresis
+    (total band width around level) ignores noise: an edge only counts once
+    the signal got from one side of the band to the other.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {DIRECTIONS}, got {direction!r}")
+    data2d = _as_2d(data)
+    if hysteresis > 0:
+        captures, indices = _hysteresis_transitions(data2d, level, direction, hysteresis)
+    else:
+        captures, indices = _level_transitions(data2d, level, direction)
+
+    before = data2d[captures, indices - 1].astype(numpy.float64)
+    after = data2d[captures, indices].astype(numpy.float64)
+    # samples on either side of the level, so after - before is never zero
+    positions = (level - before) / (after - before)
+    positions += indices - 1
+    positions = _to_time(positions, time_axis)
+
+    if numpy.ndim(data) == 1:
+        return positions
+    bounds = numpy.searchsorted(captures, numpy.arange(1, data2d.shape[0]))
+    return numpy.split(positions, bounds)
+
+
+def transition_times(data, low, high, direction='rising', hysteresis=0.0, time_axis=None):
+    """
+    Rise (or fall) times between the low and high levels, e.g. the 10 % and
+    90 % points, one value per complete edge. Returns durations in samples,
+    or seconds with a time_axis.
+    """
+    if direction not in ('rising', 'falling'):
+        raise ValueError(f"direction must be 'rising' or 'falling', got {direction!r}")
+    start_level, end_level = (low, high) if direction == 'rising' else (high, low)
+    starts = crossings(data, start_level, direction, hysteresis)
+    ends = crossings(data, end_level, direction, hysteresis)
+    if numpy.ndim(data) == 1:
+        starts, ends = [starts], [ends]
+
+    result = []
+    for start, end in zip(starts, ends):
+        # each edge starts at the last start level crossing before it reaches the end level, and after the
+        # previous edge ended
+        idx = numpy.searchsorted(start, end, side='right') - 1
+        previous_end = numpy.concatenate(([-numpy.inf], end[:-1]))
+        valid = idx >= 0
+        valid[valid] = start[idx[valid]] > previous_end[valid]
+        result.append((end[valid] - start[idx[valid]]) * _sample_interval(time_axis))
+    return _per_capture(data, result)
+
+
+def period_duty(data, level, hysteresis=0.0, time_axis=None):
+    """
+    Returns (period, frequency, duty) averaged over the complete cycles of
+    each capture, NaN if there are less than two rising edges. Period and
+    frequency are in samples unless a time_axis is given, duty is 0..1.
+    """
+    rising_all = crossings(data, level, 'rising', hysteresis)
+    falling_all = crossings(data, level, 'falling', hysteresis)
+    if numpy.ndim(data) == 1:
+        rising_all, falling_all = [rising_all], [falling_all]
+
+    periods = numpy.full(len(rising_all), numpy.nan)
+    duties = numpy.full(len(rising_all), numpy.nan)
+    for i, (rising, falling) in enumerate(zip(rising_all, falling_all)):
+        if len(rising) < 2:
+            continue
+        periods[i] = (rising[-1] - rising[0]) / (len(rising) - 1)
+        # high time of each cycle, from its rising edge to the first falling edge after it
+        idx = numpy.searchsorted(falling, rising[:-1])
+        valid = idx < len(falling)
+        valid[valid] = falling[idx[valid]] < rising[1:][valid]
+        if valid.any():
+            duties[i] = (falling[idx[valid]] - rising[:-1][valid]).sum() / (rising[1:] - rising[:-1])[valid].sum()
+
+    periods *= _sample_interval(time_axis)
+    with numpy.errstate(divide='ignore'):
+        frequencies = 1.0 / periods
+    if numpy.ndim(data) == 1:
+        return float(periods[0]), float(frequencies[0]), float(duties[0])
+    return periods, frequencies, duties
+
+
+def overshoot(data, base, top):
+    """
+    Returns (overshoot, undershoot) in percent of the base..top amplitude,
+    i.e. how far the capture goes above top and below base.
+    """
+    data2d = _as_2d(data)
+    amplitude = top - base
+    over = numpy.maximum(data2d.max(axis=-1) - top, 0) * (100.0 / amplitude)
+    under = numpy.maximum(base - data2d.min(axis=-1), 0) * (100.0 / amplitude)
+    if numpy.ndim(data) == 1:
+        return float(over[0]), float(under[0])
+    return over, under
+
+
+def mask_test(data, lower=None, upper=None):
+    """
+    Checks every sample against lower/upper limits, scalars or arrays
+    broadcastable to the capture (e.g. a reference waveform -+ tolerance).
+    Returns (passed, violations, first_violation), the number of samples
+    outside the mask and the index of the first one (-1 if none).
+    """
+    data2d = _as_2d(data)
+    outside = numpy.zeros(data2d.shape, dtype=bool)
+    if lower is not None:
+        numpy.less(data2d, lower, out=outside)
+    if upper is not None:
+        outside |= numpy.greater(data2d, upper)
+    violations = numpy.count_nonzero(outside, axis=-1)
+    first = numpy.where(violations > 0, outside.argmax(axis=-1), -1)
+    passed = violations == 0
+    if numpy.ndim(data) == 1:
+        return bool(passed[0]), int(violations[0]), int(first[0])
+    return passed, violations, first
+
+
+def _benchmark(samples=10_000_000, captures=100):
+    # python -m drivers.common.waveform_measurements
+    import time
+
+    def timed(name, func, *args, **kwargs):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        print(f"{name:>40}: {(time.perf_counter() - start) * 1e3:8.1f} ms")
+
+    rng = numpy.random.default_rng(0)
+    t = numpy.arange(samples) * 1e-8
+    # 10 kHz, 30 % duty square wave with some noise and ringing, as fetch() would return it
+    square = (((t * 1e4) % 1) < 0.3).astype(numpy.float32) * 3.3
+    square += rng.normal(0, 0.05, samples).astype(numpy.float32)
+    print(f"{samples} samples float32, {captures} captures of {samples // captures} samples")
+
+    timed('statistics', statistics, square)
+    timed('crossings', crossings, square, 1.65)
+    timed('crossings, hysteresis', crossings, square, 1.65, 'both', 0.5)
+    timed('transition_times 10-90 %', transition_times, square, 0.33, 2.97, hysteresis=0.2)
+    timed('period_duty', period_duty, square, 1.65, 0.5, t)
+    timed('overshoot', overshoot, square, 0.0, 3.3)
+    timed('mask_test', mask_test, square, -0.5, 3.8)
+    segmented = square.reshape(captures, -1)
+    timed('statistics, segmented', statistics, segmented)
+    timed('crossings, segmented', crossings, segmented, 1.65, 'rising', 0.5)
+    timed('period_duty, segmented', period_duty, segmented, 1.65, 0.5, t)
+
+    # the kind of per sample loop this replaces, on a tenth of the data
+    def loop_crossings(data, level):
+        found = []
+        for i in range(1, len(data)):
+            if data[i - 1] < level <= data[i]:
+                found.append(i - 1 + (level - data[i - 1]) / (data[i] - data[i - 1]))
+        return found
+    part = square[:samples // 10].tolist()
+    timed('python loop crossings (1/10 of data)', loop_crossings, part, 1.65)
+
+
+if __name__ == "__main__":
+    _benchmark()
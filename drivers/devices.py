@@ -1,46 +1,106 @@
-from .dmm.keithley.k2701 import KeithleyInterfaceK2701
-from .dmm.keithley.k2750 import KeithleyInterfaceK2750
-from .loads.agilent.hp605a import LoadInterfaceHP605A
-from .loads.tti.ld400p import LoadInterfaceLD400P
-from .psu.bk_precision.bk9130 import PSUInterface9130
-from .psu.rode_schwartz.hmp4030 import PSUInterfaceHMP4030
-from .psu.tti.mx100tp import PSUInterfaceMX100TP
-from .psu.tti.ql355p import PSUInterfaceQL355P
+from collections.abc import Mapping
+import importlib
 import platform
+import threading
+from .identity_matcher import IdentityMatcher, IdentityRule
 
-from .virtual_instrument_interface import \
-    VirtualPSUInterface, \
-    VirtualLoadInterface, \
-    VirtualDMMInterface, \
-    VirtualScopeInterface, \
-    VirtualI2CInterface, \
-    VirtualSPIInterface, \
-    VirtualGPIOInterface
-
+# Drivers are registered by (class name, module path, model string) and only
+# imported when an *IDN? reply matches their model or they are asked for by
+# name. This keeps heavy/native backends (e.g. aardvark_py) out of the import
+# time of scripts that only need one instrument.
+# The model string has to match the driver's _model attribute.
 _list_devices = [
-    KeithleyInterfaceK2701,
-    KeithleyInterfaceK2750,
-    LoadInterfaceHP605A,
-    LoadInterfaceLD400P,
-    PSUInterface9130,
-    PSUInterfaceMX100TP,
-    PSUInterfaceQL355P,
-    PSUInterfaceHMP4030,
-
-    VirtualPSUInterface,
-    VirtualLoadInterface,
-    VirtualDMMInterface,
-    VirtualScopeInterface,
-    VirtualI2CInterface,
-    VirtualSPIInterface,
-    VirtualGPIOInterface
+    ("KeithleyInterfaceK2701", ".dmm.keithley.k2701", "KEITHLEY INSTRUMENTS INC.,MODEL 2701"),
+    ("KeithleyInterfaceK2750", ".dmm.keithley.k2750", "KEITHLEY INSTRUMENTS INC.,MODEL 2750"),
+    ("LoadInterfaceHP605A", ".loads.agilent.HP605A", "HP605A"),
+    ("LoadInterfaceLD400P", ".loads.tti.LD400P", "LD400P"),
+    ("PSUInterface9130", ".psu.bk_precision.bk9130", "bk9130"),
+    ("PSUInterfaceMX100TP", ".psu.tti.mx100tp", "MX100TP"),
+    ("PSUInterfaceQL355P", ".psu.tti.ql355p", "QL355P"),
+    ("PSUInterfaceHMP4030", ".psu.rode_schwartz.hmp4030", "HMP4030"),
+
+    ("VirtualPSUInterface", ".virtual_instrument_interface", "NotSet"),
+    ("VirtualLoadInterface", ".virtual_instrument_interface", "NotSet"),
+    ("VirtualDMMInterface", ".virtual_instrument_interface", "NotSet"),
+    ("VirtualScopeInterface", ".virtual_instrument_interface", "NotSet"),
+    ("VirtualI2CInterface", ".virtual_instrument_interface", "NotSet"),
+    ("VirtualSPIInterface", ".virtual_instrument_interface", "NotSet"),
+    ("VirtualGPIOInterface", ".virtual_instrument_interface", "NotSet"),
 ]
 
+# Names which can be imported from this module without being a scanned device.
+_extra_names = {}
+
 if platform.machine().endswith('64'):
-    from .aardvark.aardvark_wrapper import AardvarkI2CSPI, AardvarkGPIO
-    from .aardvark.aardvark_wrapper import Aardvark
-    _list_devices.extend([AardvarkGPIO, AardvarkI2CSPI])
+    _list_devices.extend([
+        ("AardvarkGPIO", ".aardvark.aardvark_wrapper", "Not Set"),
+        ("AardvarkI2CSPI", ".aardvark.aardvark_wrapper", "Not Set"),
+    ])
+    _extra_names["Aardvark"] = ".aardvark.aardvark_wrapper"
+
+_import_lock = threading.Lock()
+
+
+def load_driver(class_name, module_path):
+    """Imports the driver module (once) and returns the driver class."""
+    with _import_lock:
+        module = importlib.import_module(module_path, __package__)
+    return getattr(module, class_name)
+
+
+class LazyDriverDict(Mapping):
+    """
+    Read only dict of key -> driver class. Keys can be listed and checked
+    without importing anything, the driver module is imported the first time
+    its value is looked up.
+    """
+    def __init__(self, entries):
+        # key -> (class name, module path)
+        self._entries = dict(entries)
+        self._loaded = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._loaded[key]
+        except KeyError:
+            pass
+        class_name, module_path = self._entries[key]
+        driver = load_driver(class_name, module_path)
+        self._loaded[key] = driver
+        return driver
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({list(self._entries)})"
+
+
+DICT_DEVICES_MODEL = LazyDriverDict(
+    (model, (name, module)) for name, module, model in _list_devices
+)
+DICT_DEVICES = LazyDriverDict(
+    (name, (name, module)) for name, module, model in _list_devices
+)
+
+# Optional structured vendor/model/firmware checks, keyed by model string, for
+# models whose string alone is not specific enough, e.g.
+#   "HMP4030": IdentityRule(vendor="HAMEG|ROHDE.*"),
+IDENTITY_RULES = {}
+
+IDENTITY_MATCHER = IdentityMatcher(DICT_DEVICES_MODEL, IDENTITY_RULES)
 
 
-DICT_DEVICES_MODEL = {device._model: device for device in _list_devices}
-DICT_DEVICES = {dev.__name__: dev for dev in _list_devices}
+def __getattr__(name):
+    # Keep `from .devices import PSUInterfaceMX100TP` working, lazily.
+    if name in DICT_DEVICES:
+        return DICT_DEVICES[name]
+    if name in _extra_names:
+        return load_driver(name, _extra_names[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
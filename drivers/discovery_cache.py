@@ -0,0 +1,76 @@
+import threading
+import time
+from .common.json_file import default_json_path, load_json_file, save_json_file
+
+# Location of the on-disk cache, can be overridden with an env variable.
+DEFAULT_CACHE_PATH = default_json_path('ATE_DISCOVERY_CACHE', '.ate_discovery_cache.json')
+
+
+class DiscoveryCache:
+    """
+    Persistent mapping of VISA resource string -> last known working serial
+    settings and matched driver, so a scan can validate an instrument with a
+    single *IDN? instead of repeating the baud/terminator sweep.
+
+    Entry format:
+        {
+            "baud_rate": 9600,
+            "read_termination": "\\n",
+            "identity": "<*IDN? reply>",
+            "driver": "<class name from DICT_DEVICES>",
+            "timestamp": <time.time() when stored>
+        }
+    """
+    def __init__(self, path=None, max_age=None):
+        self.path = path if path is not None else DEFAULT_CACHE_PATH
+        self.max_age = max_age  # seconds, None means entries never expire
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.load()
+
+    def load(self):
+        # Missing or corrupt cache is the same as an empty one.
+        self._entries = load_json_file(self.path)
+
+    def save(self):
+        with self._lock:
+            data = dict(self._entries)
+        save_json_file(self.path, data, "discovery cache")
+
+    def get(self, resource):
+        with self._lock:
+            entry = self._entries.get(resource)
+        if entry is None:
+            return None
+        if self.max_age is not None and time.time() - entry.get('timestamp', 0) > self.max_age:
+            return None
+        return entry
+
+    def update(self, resource, baud_rate, read_termination, identity, driver):
+        with self._lock:
+            self._entries[resource] = {
+                'baud_rate': baud_rate,
+                'read_termination': read_termination,
+                'identity': identity,
+                'driver': driver,
+                'timestamp': time.time(),
+            }
+
+    def invalidate(self, resource=None, max_age=None):
+        """
+        Removes cached entries. With no arguments the whole cache is cleared,
+        otherwise only the given resource and/or entries older than max_age
+        seconds are dropped.
+        """
+        with self._lock:
+            if resource is None and max_age is None:
+                self._entries = {}
+                return
+            if resource is not None:
+                self._entries.pop(resource, None)
+            if max_age is not None:
+                now = time.time()
+                self._entries = {
+                    res: entry for res, entry in self._entries.items()
+                    if now - entry.get('timestamp', 0) <= max_age
+                }
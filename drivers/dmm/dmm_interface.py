@@ -1,7 +1,8 @@
 from ..base_instrument_interface import BaseInterface
+from ..async_interface import AsyncDMMMixin
 
 
-class DMMInterface(BaseInterface):
+class DMMInterface(BaseInterface, AsyncDMMMixin):
     def enable_channel(self, chan):
         raise NotImplementedError
 
@@ -23,6 +24,9 @@ class DMMInterface(BaseInterface):
     def get_current(self, chan):
         raise NotImplementedError
 
+    def scan(self, chans, function="VOLT:DC", as_array=False):
+        raise NotImplementedError
+
     def get_identity(self):
         raise NotImplementedError
 
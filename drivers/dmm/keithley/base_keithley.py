@@ -1,5 +1,9 @@
+import math
+import threading
 from ..dmm_interface import DMMInterface
+from ...command_queue import serialised
 from ...common.errors import BadData
+from ...common.response_parser import parse_float, parse_floats
 from ...common.scpi_commands import SCPI_IDENTIFY, SCPI_IDENTIFY_OPTIONS_QUERY
 
 MODULES_CHAN_CAPABILITY = {
@@ -11,15 +15,58 @@ MODULES_CHAN_CAPABILITY = {
     "NONE": 0
 }
 
+# Measurement functions scan() accepts
+SCAN_FUNCTIONS = ("VOLT:DC", "VOLT:AC", "RES", "TEMP")
+
+# Binary transfer width -> (FORMat:DATA name, struct datatype)
+BINARY_FORMATS = {
+    32: ("SREal", "f"),
+    64: ("DREal", "d")
+}
+
+# Rough upper bound of the time one channel takes within a scan (relay + reading).
+SCAN_TIMEOUT_PER_CHANNEL_MS = 100
+
+
+class _Configuration:
+    """Measurement setup of one instrument session."""
+    def __init__(self):
+        # (function, chan, range, nplc) the instrument is currently configured for, None if unknown.
+        self.state = None
+
+
+# Keyed like the command queues (resource name), so every driver object
+# sharing a pooled session sees the same setup.
+_configurations = {}
+_configurations_lock = threading.Lock()
+
+
+def _get_configuration(key):
+    with _configurations_lock:
+        configuration = _configurations.get(key)
+        if configuration is None:
+            configuration = _configurations[key] = _Configuration()
+        return configuration
+
+
 # Chan usage: Indexed from 1 to 40. 
 class KeithleyInterface(DMMInterface):
     # Default values
     overflow_number = 9.9E37
     index_serial = 2
     identity_delimiter = ','
+    # None means ASCII transfers, otherwise a key of BINARY_FORMATS
+    binary_format = None
+    elements = ("READing",)
+    # Requested range/integration time, None leaves the CONFigure defaults (auto range)
+    measure_range = None
+    nplc = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self._configuration = _get_configuration(self._command_queue_key())
+        # Do not trust a setup made before this driver was created.
+        self.invalidate_configuration()
         self.query_modules_slots()
 
     def query_modules_slots(self):
@@ -38,17 +85,44 @@ class KeithleyInterface(DMMInterface):
 
         # Autoconfigure list of valid channels. 
         self.channels = [i for i in range(1, max_channels+1)]
+        self._build_channel_table()
         return reply
 
+    def _build_channel_table(self):
+        # Precompute raw channel -> slot channel address (e.g. 21 -> '201') so
+        # conversions are a dict lookup instead of walking the slots each time.
+        self._chan_addresses = {}
+        chan = 1
+        for slot, slot_channel in enumerate(self.slot_channels, start=1):
+            for slot_chan in range(1, slot_channel + 1):
+                self._chan_addresses[chan] = f'{slot}{slot_chan:02d}'
+                chan = chan + 1
+        self._chan_strings = {
+            chan: f'(@{address})' for chan, address in self._chan_addresses.items()
+        }
 
     def convert_chan(self, chan):        
-        return self._get_slot_channel_str(*self._get_slot_channel_value(chan))
+        try:
+            return self._chan_strings[chan]
+        except KeyError:
+            raise ValueError(f"Invalid {self._model} channel selected: {chan}")
+
+    def convert_chan_list(self, chans):
+        """
+        Converts a list of raw channels to a single channel list string,
+        e.g. [1, 2, 21] -> '(@101,102,201)'
+        """
+        try:
+            return '(@' + ','.join([self._chan_addresses[chan] for chan in chans]) + ')'
+        except KeyError as err:
+            raise ValueError(f"Invalid {self._model} channel selected: {err.args[0]}")
 
     def disable_all_channels(self):
         """
         Opens all relays in the keithley slots.
         """
         cmd = "ROUTe:OPEN:ALL"
+        self.invalidate_configuration()
         self._write(cmd)
 
     def enable_channel(self, chan):
@@ -56,79 +130,201 @@ class KeithleyInterface(DMMInterface):
         Closes the relay on that channel
         """
         cmd = f"ROUTe:CLOSE {self.convert_chan(chan)}"
+        self.invalidate_configuration()
         self._write(cmd)
 
-    def _get_slot_channel_value(self, chan):
-        if chan not in self.channels:
-            raise ValueError(f"Invalid {self._model} channel selected: {chan}")
-        # Convert a raw channel number to a particular slot's channel
-        n = 0
-        slot = 1
-        for slot_channel in self.slot_channels:
-            n = n + slot_channel
-            if chan <= n:
-                break
-            else:
-                slot = slot + 1
+    def _parse_string_data(self, string, chan):
+        try:
+            value = parse_float(string.split(',')[0])
+        except ValueError:
+            raise BadData
+        if value == self.overflow_number:
+            raise BadData(f"Error: Overflow on {chan}")
+        return value
 
-        return slot, abs(chan - (n - slot_channel))
+    @serialised
+    def set_binary_format(self, bits=32, elements=("READing",)):
+        """
+        Switches reading transfers to IEEE754 binary (SREal/DREal) with the
+        given FORMat:ELEMents. READing must be one of the elements and is
+        always the first value of each reading.
+        """
+        if bits not in BINARY_FORMATS:
+            raise ValueError(f"Unsupported binary format on {self._model}: {bits} bits")
+        if "READing" not in elements:
+            raise ValueError("READing has to be one of the selected elements")
+        data_format, _ = BINARY_FORMATS[bits]
+        self._write(f'FORMat:DATA {data_format}')
+        self._write('FORMat:BORDer SWAPped')  # little endian
+        self._write(f'FORMat:ELEMents {",".join(elements)}')
+        self.binary_format = bits
+        self.elements = tuple(elements)
 
-    def _get_slot_channel_str(self, slot, chan):
-        if chan not in self.channels:
-            raise ValueError(f"Invalid {self._model} channel selected: {chan}")
-        return f'(@{slot}{chan:02d})'
+    @serialised
+    def set_ascii_format(self):
+        self._write('FORMat:DATA ASCii')
+        self._write('FORMat:ELEMents READing')
+        self.binary_format = None
+        self.elements = ("READing",)
 
-    def _parse_string_data(self, units, string, chan):
-        try:
-            # TODO regex will simplify this massively. 
-            value_str = string.split(',')[0]
-            if units in value_str:
-                value_str = value_str.split(units)[0]
-            value = float(value_str)
-            if value == self.overflow_number:
-                raise BadData(f"Error: Overflow on {chan}")
-            return value
-        except (ValueError, IndexError):
-            raise BadData
+    def _query_binary_readings(self, cmd):
+        """
+        Queries binary readings straight into a NumPy array of shape
+        (readings, elements). Overflowed values are replaced by NaN.
+        """
+        import numpy
+        _, datatype = BINARY_FORMATS[self.binary_format]
+        values = self._query_binary(cmd, datatype=datatype, is_big_endian=False, container=numpy.array)
+        values = numpy.asarray(values, dtype=float).reshape(-1, len(self.elements))
+        # Float32 does not hold 9.9E37 exactly.
+        values[values >= self.overflow_number * 0.999] = numpy.nan
+        return values
 
-    def get_voltage_dc(self, chan):
-        units = 'VDC'
-        cmd = f'MEASure:VOLTage:DC? {self.convert_chan(chan)}'
-        raw = self._query(cmd)
-        if isinstance(raw, str):
-            return self._parse_string_data(units, raw, chan)
-        else:
-            return raw
+    def set_range(self, measure_range=None):
+        """Sets the range used for following measurements, None is auto range."""
+        self.measure_range = measure_range
 
-    def get_impedance(self, chan):
-        units = 'OHM'
-        cmd = f'MEASure:RESistance? {self.convert_chan(chan)}'
+    def set_nplc(self, nplc=None):
+        """Sets the integration time (power line cycles), None is the default."""
+        self.nplc = nplc
 
-        raw = self._query(cmd)
+    def invalidate_configuration(self):
+        """
+        Forgets the cached measurement setup so the next reading reconfigures.
+        Commands sent through _write()/_query() (e.g. controller custom
+        commands) already do this, call it after changing function/route/range
+        any other way.
+        """
+        self._configuration.state = None
+
+    @serialised
+    def _write(self, _str):
+        # Any write may change function, route, range or NPLC. _configure()
+        # records the new setup after its own writes.
+        self.invalidate_configuration()
+        return super()._write(_str)
+
+    @serialised
+    def _query(self, _str):
+        # Only the driver's READ? leaves the setup alone, a custom query such as
+        # MEASure? reconfigures the instrument.
+        if _str != 'READ?':
+            self.invalidate_configuration()
+        return super()._query(_str)
+
+    def _configure(self, function, chan):
+        # CONFigure resets range, NPLC and recloses the route, so only send it
+        # when the requested setup differs from what the instrument already has.
+        state = (function, chan, self.measure_range, self.nplc)
+        if state == self._configuration.state:
+            return
+        self._configuration.state = None
+        self._write(f'CONFigure:{function} {self.convert_chan(chan)}')
+        if self.measure_range is not None and function != 'TEMP':
+            self._write(f'SENSe:{function}:RANGe {self.measure_range}')
+        # The AC voltage function has no NPLC setting.
+        if self.nplc is not None and function != 'VOLT:AC':
+            self._write(f'SENSe:{function}:NPLCycles {self.nplc}')
+        self._configuration.state = state
+
+    @serialised
+    def _measure(self, function, chan):
+        self._configure(function, chan)
+        try:
+            if self.binary_format is not None:
+                value = float(self._query_binary_readings('READ?')[0, 0])
+                if math.isnan(value):
+                    raise BadData(f"Error: Overflow on {chan}")
+                return value
+            raw = self._query('READ?')
+        except IOError:
+            # The instrument state is unknown after a failed transaction.
+            self.invalidate_configuration()
+            raise
 
         if isinstance(raw, str):
-            return self._parse_string_data(units, raw, chan)
+            return self._parse_string_data(raw, chan)
         else:
             return raw
 
+    def get_voltage_dc(self, chan):
+        return self._measure('VOLT:DC', chan)
+
+    def get_impedance(self, chan):
+        return self._measure('RES', chan)
+
     def get_voltage_ac(self, chan):
-        units = 'VAC'        
-        cmd = f'MEASure:VOLTage:AC? {self.convert_chan(chan)}'
-        raw = self._query(cmd)
-        if isinstance(raw, str):
-            return self._parse_string_data(units, raw, chan)
-        else:
-            return raw
+        return self._measure('VOLT:AC', chan)
 
     def get_temperature(self, chan):
-        units = 'C'        
-        cmd = f'MEAS:TEMP? {self.convert_chan(chan)}'
+        return self._measure('TEMP', chan)
 
-        raw = self._query(cmd)
-        if isinstance(raw, str):
-            return self._parse_string_data(units, raw, chan)
-        else:
-            return raw
+    def _parse_scan_data(self, string, chans):
+        try:
+            values = parse_floats(string)
+        except ValueError:
+            raise BadData
+        if len(values) != len(chans):
+            raise BadData(f"Error: Expected {len(chans)} readings, got {len(values)}")
+        # A single open/overloaded channel should not throw away the whole scan.
+        return {
+            chan: float('nan') if value == self.overflow_number else value
+            for chan, value in zip(chans, values)
+        }
+
+    @serialised
+    def scan(self, chans, function="VOLT:DC", as_array=False):
+        """
+        Measures all chans in one hardware scan instead of one MEASure per
+        channel. The scan list, function and sample count are programmed once
+        and every reading is transferred with a single READ?.
+        Returns a {chan: value} dict (overflowed channels are NaN), or a NumPy
+        array in chans order when as_array is set. In binary format the array
+        is (chans, elements) when more than one element is selected.
+        """
+        if function not in SCAN_FUNCTIONS:
+            raise ValueError(f"Unsupported scan function on {self._model}: {function}")
+        chans = list(chans)
+        if not chans:
+            return {}
+        chan_list = self.convert_chan_list(chans)
+
+        # The scan reprograms function, sample count and route.
+        self.invalidate_configuration()
+        self._write('TRACe:CLEar')
+        self._write('INITiate:CONTinuous OFF')
+        self._write('TRIGger:SOURce IMMediate')
+        self._write('TRIGger:COUNt 1')
+        self._write(f'SAMPle:COUNt {len(chans)}')
+        self._write(f'FORMat:ELEMents {",".join(self.elements)}')
+        self._write(f"SENSe:FUNCtion '{function}', {chan_list}")
+        self._write(f'ROUTe:SCAN {chan_list}')
+        self._write('ROUTe:SCAN:TSOurce IMMediate')
+        self._write('ROUTe:SCAN:LSELect INTernal')
+
+        timeout = self.resource.timeout
+        self.resource.timeout = max(timeout, len(chans) * SCAN_TIMEOUT_PER_CHANNEL_MS)
+        try:
+            if self.binary_format is not None:
+                data = self._query_binary_readings('READ?')
+            else:
+                raw = self._query('READ?')
+        finally:
+            self.resource.timeout = timeout
+            self._write('ROUTe:SCAN:LSELect NONE')
+
+        if self.binary_format is not None:
+            if len(data) != len(chans):
+                raise BadData(f"Error: Expected {len(chans)} readings, got {len(data)}")
+            if as_array:
+                return data[:, 0] if data.shape[1] == 1 else data
+            return {chan: float(value) for chan, value in zip(chans, data[:, 0])}
+
+        readings = self._parse_scan_data(raw, chans)
+        if as_array:
+            import numpy
+            return numpy.array([readings[chan] for chan in chans], dtype=float)
+        return readings
 
     def get_mac_address(self):
         cmd = 'SYST:COMM:ETH:MAC?'
@@ -0,0 +1,71 @@
+import re
+
+# A model string only matches when it is not glued to further letters/digits,
+# e.g. "MODEL 2701" must not hit inside "MODEL 27010".
+_BOUNDARY_BEFORE = r'(?<![A-Za-z0-9])'
+_BOUNDARY_AFTER = r'(?![A-Za-z0-9])'
+
+# *IDN? reply field order
+IDN_FIELDS = ('vendor', 'model', 'serial', 'firmware')
+
+
+def split_identity(identity):
+    """Splits an *IDN? reply into a dict of IDN_FIELDS (missing fields are '')."""
+    values = [field.strip() for field in identity.strip().split(',')]
+    values += [''] * (len(IDN_FIELDS) - len(values))
+    return dict(zip(IDN_FIELDS, values))
+
+
+class IdentityRule:
+    """
+    Structured check on the *IDN? fields. Every given field is a regex that
+    must fully match the corresponding field (case insensitive), e.g.
+        IdentityRule(vendor='HAMEG|ROHDE', firmware=r'HW.*')
+    """
+    def __init__(self, **fields):
+        unknown = set(fields) - set(IDN_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown *IDN? fields in rule: {unknown}")
+        self._fields = {
+            name: re.compile(pattern, re.IGNORECASE) for name, pattern in fields.items()
+        }
+
+    def matches(self, identity):
+        fields = split_identity(identity)
+        return all(regex.fullmatch(fields[name]) for name, regex in self._fields.items())
+
+
+class IdentityMatcher:
+    """
+    Matches an *IDN? reply against all registered model strings with one
+    precompiled regex instead of a linear substring scan. When several model
+    strings hit, the longest (most specific) one wins. Optional rules keyed by
+    model string must additionally pass for that model to be picked.
+    """
+    def __init__(self, models, rules=None):
+        self._rules = dict(rules) if rules else {}
+        models = sorted(set(models), key=len, reverse=True)
+        if models:
+            alternation = '|'.join(re.escape(model) for model in models)
+            # Zero width lookahead so overlapping candidates are all reported,
+            # longest alternative first at each position.
+            self._pattern = re.compile(
+                f'(?=({_BOUNDARY_BEFORE}(?:{alternation}){_BOUNDARY_AFTER}))'
+            )
+        else:
+            self._pattern = None
+
+    def candidates(self, identity):
+        """All distinct model strings found in identity, longest first."""
+        if self._pattern is None:
+            return []
+        found = {match.group(1) for match in self._pattern.finditer(identity)}
+        return sorted(found, key=len, reverse=True)
+
+    def match(self, identity):
+        """Returns the best matching model string or None."""
+        for model in self.candidates(identity):
+            rule = self._rules.get(model)
+            if rule is None or rule.matches(identity):
+                return model
+        return None
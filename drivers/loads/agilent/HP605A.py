@@ -1,5 +1,6 @@
 from ...loads.load_interface import LoadInterface
 from ...common import scpi_commands as cmds
+from ...command_queue import serialised
 
 
 class LoadInterfaceHP605A(LoadInterface):
@@ -13,42 +14,52 @@ class LoadInterfaceHP605A(LoadInterface):
             raise ValueError
         self._write(f"CHAN {chan}")
 
+    @serialised
     def input_on(self, chan=None):
         self._sel_chan(chan)
         self._write("INPUT ON")
 
+    @serialised
     def input_off(self, chan=None):
         self._sel_chan(chan)
         self._write("INPUT OFF")
 
+    @serialised
     def set_current_load(self, current, chan=None):
         self._sel_chan(chan)
         self._write('CURR %f' % current)
 
+    @serialised
     def get_current_load(self, chan=None):
         self._sel_chan(chan)
         return self.response_to_float(self._query('MEAS:CURR?'))
 
+    @serialised
     def set_voltage_load(self, voltage, chan=None):
         self._sel_chan(chan)
         self._write('VOLT:TRIG  %f' % voltage)
 
+    @serialised
     def get_voltage_load(self, chan=None):
         self._sel_chan(chan)
         return self.response_to_float(self._query('MEAS:VOLT?'))
 
+    @serialised
     def set_resistance_load(self, ohms, chan=None):
         self._sel_chan(chan)
         self._write('RES %i' % ohms)
 
+    @serialised
     def set_mode_current(self, chan=None):
         self._sel_chan(chan)
         self._write('MODE:CURR')
 
+    @serialised
     def set_mode_voltage(self, chan=None):
         self._sel_chan(chan)
         self._write('MODE:VOLT')
 
+    @serialised
     def set_mode_resistance(self, chan=None):
         self._sel_chan(chan)
         self._write('MODE:RES')
@@ -1,7 +1,8 @@
 from ..base_instrument_interface import BaseInterface
+from ..async_interface import AsyncLoadMixin
 
 
-class LoadInterface(BaseInterface):
+class LoadInterface(BaseInterface, AsyncLoadMixin):
 
     def set_level(self, value, chan=None):
         raise NotImplementedError
@@ -1,7 +1,10 @@
+import asyncio
+import contextlib
 import ctypes
 import ctypes.util
 import sys
 import math
+import threading
 import time
 import numpy
 
@@ -9,6 +12,22 @@ from .pico_status import PicoStatus
 from . import ps2000a_api, ps3000a_api
 
 
+# TimeUnits name -> seconds
+TIME_UNIT_SECONDS = {
+    'FS': 1e-15,
+    'PS': 1e-12,
+    'NS': 1e-9,
+    'US': 1e-6,
+    'MS': 1e-3,
+    'S': 1.0,
+}
+
+
+# get_values() retries while a ready scope still reports PICO_NO_SAMPLES_AVAILABLE
+NO_SAMPLES_RETRIES = 10
+NO_SAMPLES_RETRY_DELAY = 0.01
+
+
 class PicoScopeException(Exception):
     pass
 
@@ -56,6 +75,7 @@ class ChannelInfo():
         self._adc_min = adc_min
         self.reset()
         self._data_buffer = None
+        self._data_array = None  # zero-copy NumPy view of _data_buffer
         self.overflow = False
         self._max_buffer = (ctypes.c_int16 * self.MIN_BUFFER_LENGTH)()
         self._min_buffer = (ctypes.c_int16 * self.MIN_BUFFER_LENGTH)()
@@ -77,7 +97,10 @@ class ChannelInfo():
         self._max_buffer[0] = 0
         self._min_buffer[0] = 0
         samples = max(samples, self.MIN_BUFFER_LENGTH)
-        self._data_buffer = (ctypes.c_int16 * samples)()
+        # Keep the buffer across captures of the same length, allocating it is expensive for long captures.
+        if self._data_buffer is None or len(self._data_buffer) != samples:
+            self._data_buffer = (ctypes.c_int16 * samples)()
+            self._data_array = numpy.ctypeslib.as_array(self._data_buffer)
         return self._data_buffer, samples
 
     def min_max_buffers(self):
@@ -89,10 +112,29 @@ class ChannelInfo():
             # if any sample was fullscale value, set overflow flag too
             self.overflow = (self._max_buffer[0] >= self._adc_max) or (self._max_buffer[0] <= self._adc_min)
 
-    def get_data(self, capture_length):
-        return (numpy.array(self._data_buffer[:capture_length],
-                            dtype='float_') * self.rng_volt / self._adc_max - self.offset,
-                self.overflow)
+    def scale(self, raw, out=None, dtype=numpy.float64):
+        """Converts raw ADC counts to volts in one vectorised pass (into out if given)."""
+        if out is not None:
+            dtype = out.dtype
+        out = numpy.multiply(raw, self.rng_volt / self._adc_max, out=out, dtype=dtype, casting='unsafe')
+        out -= self.offset
+        return out
+
+    def get_data(self, capture_length, out=None, dtype=numpy.float64, raw=False):
+        """Returns (data, overflow) of the last capture.
+
+        data is in volts, written to out (e.g. the array returned by the previous call) if given, otherwise to a new
+        array of dtype (float32 halves the memory of long captures). With raw set data is the int16 ADC counts as a
+        view of the capture buffer, it is only valid until the next capture of the same length.
+        """
+        data = self._data_array[:capture_length]
+        if raw:
+            return data, self.overflow
+        if out is not None:
+            if len(out) < capture_length:
+                raise ValueError('Output array too small: {} < {}'.format(len(out), capture_length))
+            out = out[:capture_length]
+        return self.scale(data, out=out, dtype=dtype), self.overflow
 
     def __str__(self):
         return '{}, {}, range: {} V, offset: {} V'.format(
@@ -205,14 +247,27 @@ class Picoscope():
         api_dict = {fname: get_call(fapi, lib) for fname, fapi in api.FUNCTION.items()}
         self._api = type('PicoScopeApi', (object, ), api_dict)
 
-        for itm in 'ChannelCoupling', 'TriggerDirection', 'RatioMode', 'CHANNELS', 'RANGES':
+        for itm in 'ChannelCoupling', 'TriggerDirection', 'RatioMode', 'TimeUnits', 'StreamingReady', 'BlockReady', \
+                   'CHANNELS', 'RANGES', 'timebase_for_interval':
             setattr(self, itm, getattr(api, itm))
 
+        # _find_timebase() results, see there
+        self._timebase_cache = {}
+        # Last channel/trigger settings sent to the scope, unchanged settings are not sent again.
+        self._channel_state = {}
+        self._trigger_state = None
+        self._defer_depth = 0
+
         self._init_channels()
         # TODO: disable (or handle somehow) digital ports?
 
         self._capture_length = None
 
+        # Set by the run_block() ready callback from the driver's thread. The ctypes callback object has to stay
+        # referenced for as long as a capture may call it.
+        self._ready_event = threading.Event()
+        self._block_ready = self.BlockReady(self._on_block_ready)
+
         # mapping for the set_trigger() param
         self._api.TRIGGER_DIRECTION = [
             None,
@@ -224,30 +279,71 @@ class Picoscope():
         self._set_trigger()
 
     def _set_channel(self, ch_info):
-        r = self._api.set_channel(self._handle,
-                                  ch_info.idx,
-                                  ch_info.active,
-                                  ch_info.coupling.value,
-                                  ch_info.rng,
-                                  ch_info.offset)
+        if self._defer_depth:
+            # pushed by apply() when the configure() block ends
+            return
+        self._push_channel(ch_info)
+
+    def _push_channel(self, ch_info):
+        state = (ch_info.active, ch_info.coupling.value, ch_info.rng, ch_info.offset)
+        if self._channel_state.get(ch_info.idx) == state:
+            return
+        # forget the cached state first, a failed call leaves the scope state unknown
+        self._channel_state.pop(ch_info.idx, None)
+        r = self._api.set_channel(self._handle, ch_info.idx, *state)
         if r != PicoStatus.PICO_OK:
             raise PicoScopeException('Can not set channel {} to {}: {}'.format(self.CHANNELS[ch_info.idx],
                                                                                str(ch_info),
                                                                                r.name))
+        self._channel_state[ch_info.idx] = state
 
     def _set_trigger(self):
         if self.trigger is None:
-            r = self._api.set_simple_trigger(self._handle, False, 0, 0, 0, 0, 0)
+            args = (False, 0, 0, 0, 0, 0)
         else:
-            r = self._api.set_simple_trigger(self._handle,
-                                             True,
-                                             self.trigger.channel.idx,
-                                             self.trigger.channel.to_adc_value(self.trigger.level),
-                                             self.trigger.direction.value,
-                                             -int(self.trigger.pretrig // self._dt) if self.trigger.pretrig < 0 else 0,
-                                             0)
+            args = (True,
+                    self.trigger.channel.idx,
+                    self.trigger.channel.to_adc_value(self.trigger.level),
+                    self.trigger.direction.value,
+                    -int(self.trigger.pretrig // self._dt) if self.trigger.pretrig < 0 else 0,
+                    0)
+        if self._trigger_state == args:
+            return
+        self._trigger_state = None
+        r = self._api.set_simple_trigger(self._handle, *args)
         if r != PicoStatus.PICO_OK:
             raise PicoScopeException('Can not set trigger {}: {}'.format(self.trigger, r.name))
+        self._trigger_state = args
+
+    def apply(self):
+        """Pushes every channel whose configuration differs from what the scope was last sent.
+
+        Always pushes, also inside a configure() block, so arm(), set_timebase(), stream() and capture_many() never
+        run against settings the scope was not sent.
+        """
+        for ch in self.channel.values():
+            self._push_channel(ch)
+
+    @contextlib.contextmanager
+    def configure(self):
+        """Batches channel changes into at most one set_channel() call per channel, e.g.
+
+            with scope.configure():
+                scope.activate_channel('A')
+                scope.set_channel_range(5, 'A')
+                scope.set_channel_coupling(True, 'A')
+
+        The changes are pushed when the (outermost) block ends, even if it is left by an exception, so the scope
+        always matches the ChannelInfo state. arm(), set_timebase(), stream() and capture_many() called inside the
+        block push the pending changes first.
+        """
+        self._defer_depth += 1
+        try:
+            yield self
+        finally:
+            self._defer_depth -= 1
+            if not self._defer_depth:
+                self.apply()
 
     def close(self):
         if self._api is not None and self._handle is not None:
@@ -297,6 +393,8 @@ class Picoscope():
     def set_timebase(self, *, duration=None, samples=None, sample_time=None):
         if len([1 for x in [duration, samples, sample_time] if x]) != 2:
             raise ValueError('set_timebase() needs exactly two arguments set')
+        # available timebases depend on the channels enabled in the scope
+        self.apply()
         self._timebase_id, self._samples, self._oversample, self._dt = self._find_timebase(duration=duration,
                                                                                            samples=samples,
                                                                                            sample_time=sample_time)
@@ -319,6 +417,7 @@ class Picoscope():
         # _capture_length works as a flag too, when not None the get_data() was called after arming the scope
         # and waveforms can be retrieved from buffers in ChannelInfo instances
         self._capture_length = None
+        self.apply()
         self._set_trigger()
         if self.trigger is not None and self.trigger.pretrig > 0:
             pre_trig_samples = int(self.trigger.pretrig // self._dt)
@@ -326,6 +425,7 @@ class Picoscope():
             pre_trig_samples = 0
         post_trig_samples = self._samples - pre_trig_samples
         c_time_indisposed_ms = ctypes.c_int32()
+        self._ready_event.clear()
         # Note: It seems that A-API library does not like non-zero oversample parameter passed to the RunBlock
         # call (PICO_INVALID_PARAMETER is retuned) despite it is documented as "not used".
         r = self._api.run_block(self._handle,
@@ -335,17 +435,234 @@ class Picoscope():
                                 0,  # oversample (not used)
                                 c_time_indisposed_ms,
                                 0,  # segment_index
-                                None,  # lpReady (callback)
+                                self._block_ready,  # lpReady (callback)
                                 None)  # pparameter
         if r != PicoStatus.PICO_OK:
             raise PicoScopeException('Could not arm the PicoScope: {}'.format(r.name))
 
-    def _do_fetch(self, max_wait=None):
+    def _on_block_ready(self, handle, status, param):
+        # Called from the driver's thread, keep it short.
+        self._ready_event.set()
+
+    def _wait_ready(self, max_wait=None):
+        """Waits until the armed capture is complete, returns False if max_wait seconds passed first.
+
+        Wakes up as soon as the run_block() ready callback fires. is_ready() is still polled every delay seconds as a
+        fallback in case the callback never arrives, and confirms the callback is not a late one from a stopped run.
+        """
         delay = 0.2
         if max_wait is not None:
             timeout = time.monotonic() + max_wait
             if delay > max_wait / 10:
                 delay = max_wait / 10
+        while True:
+            self._ready_event.wait(delay)
+            # Clear before asking, a callback firing after is_ready() returned False then still wakes up the next
+            # wait instead of being lost.
+            self._ready_event.clear()
+            if self.is_ready():
+                return True
+            if max_wait is not None and time.monotonic() > timeout:
+                return False
+
+    async def wait_ready_async(self, max_wait=None):
+        """asyncio flavour of the ready wait, e.g. scope.arm(); await scope.wait_ready_async(1.0); scope.fetch()"""
+        return await asyncio.get_running_loop().run_in_executor(None, self._wait_ready, max_wait)
+
+    def _set_segments(self, n_segments):
+        c_max_samples = ctypes.c_int32()
+        r = self._api.memory_segments(self._handle, n_segments, c_max_samples)
+        if r != PicoStatus.PICO_OK:
+            raise PicoScopeException('Could not split memory into {} segments: {}'.format(n_segments, r.name))
+        r = self._api.set_no_of_captures(self._handle, n_segments)
+        if r != PicoStatus.PICO_OK:
+            raise PicoScopeException('Could not set number of captures to {}: {}'.format(n_segments, r.name))
+        return c_max_samples.value
+
+    def capture_many(self, n_captures, max_wait=None, raw=False):
+        """Rapid block capture of n_captures triggered waveforms into segmented memory.
+
+        The scope re-arms itself between triggers, so captures follow each other without any Python round trip.
+        Returns ({channel name: (data, overflow)}, trigger_time_offsets), where data is a (n_captures x samples)
+        array (raw int16 ADC counts if raw is set, volts otherwise), overflow a bool array per capture and
+        trigger_time_offsets the per capture trigger time offsets in seconds.
+        Returns (None, None) if the captures did not complete within max_wait seconds.
+        """
+        active = [ch for ch in self.channel.values() if ch.active]
+        if not active:
+            raise ValueError('No active channel to capture.')
+
+        try:
+            # nMaxSamples of a segment is shared by all active channels
+            max_samples = self._set_segments(n_captures) // len(active)
+            if self._samples > max_samples:
+                raise PicoScopeException('{} samples of {} channels do not fit into a segment of {} captures '
+                                         '(max {} per channel).'.format(self._samples, len(active), n_captures,
+                                                                        max_samples))
+            self.arm()
+            if not self._wait_ready(max_wait):
+                self.stop()
+                return None, None
+
+            if self._oversample > 1:
+                ratio_mode = self.RatioMode.AVERAGE.value
+            else:
+                ratio_mode = self.RatioMode.NONE.value
+            samples = self._samples // self._oversample
+            buffer_length = max(samples, ChannelInfo.MIN_BUFFER_LENGTH)
+
+            raw_data = {}
+            for ch in active:
+                data = numpy.empty((n_captures, buffer_length), dtype=numpy.int16)
+                raw_data[ch.idx] = data
+                for segment in range(n_captures):
+                    r = self._api.set_data_buffer(self._handle,
+                                                  ch.idx,
+                                                  data[segment].ctypes.data_as(ctypes.POINTER(ctypes.c_int16)),
+                                                  buffer_length,
+                                                  segment,
+                                                  ratio_mode)
+                    if r != PicoStatus.PICO_OK:
+                        raise PicoScopeException('set_data_buffer() for segment {} failed: {}'.format(segment,
+                                                                                                    r.name))
+
+            c_no_of_samples = ctypes.c_uint32(samples)
+            c_overflow = (ctypes.c_int16 * n_captures)()
+            r = self._api.get_values_bulk(self._handle,
+                                          c_no_of_samples,
+                                          0,  # fromSegmentIndex
+                                          n_captures - 1,  # toSegmentIndex
+                                          self._oversample,
+                                          ratio_mode,
+                                          c_overflow)
+            if r != PicoStatus.PICO_OK:
+                raise PicoScopeException('get_values_bulk() failed: {}'.format(r.name))
+
+            c_times = (ctypes.c_int64 * n_captures)()
+            c_time_units = (ctypes.c_int32 * n_captures)()
+            r = self._api.get_values_trigger_time_offset_bulk64(self._handle, c_times, c_time_units,
+                                                                 0, n_captures - 1)
+            if r != PicoStatus.PICO_OK:
+                raise PicoScopeException('get_values_trigger_time_offset_bulk64() failed: {}'.format(r.name))
+            trigger_time_offsets = numpy.array(
+                [t * TIME_UNIT_SECONDS[self.TimeUnits(u).name] for t, u in zip(c_times, c_time_units)])
+        finally:
+            # back to a single segment for block mode
+            self._set_segments(1)
+            self._capture_length = None
+
+        overflow_bits = numpy.ctypeslib.as_array(c_overflow)
+        result = {}
+        for ch in active:
+            data = raw_data[ch.idx][:, :c_no_of_samples.value]
+            if not raw:
+                data = ch.scale(data)
+            result[self.CHANNELS[ch.idx]] = (data, (overflow_bits & (1 << ch.idx)) != 0)
+        return result, trigger_time_offsets
+
+    def fetch_downsampled(self, mode, ratio, start=0, samples=None, max_wait=None, raw=False):
+        """Fetches a downsampled view of the last block capture of all active channels, reduced by the driver.
+
+        mode is 'aggregate' (min/max envelope), 'decimate' (every ratio-th sample) or 'average' (or the RatioMode
+        member); each returned point covers ratio raw samples, starting at raw sample index start and covering
+        samples raw samples (the rest of the capture if None). Only the reduced points are transferred from the
+        scope, so e.g. an envelope of a long record can be plotted or checked without reading every sample. Can be
+        called repeatedly with different modes, ratios and windows for the same capture.
+        Returns ({channel name: (data, overflow)}, time_axis), data being a (max, min) tuple of arrays for
+        'aggregate' and an array otherwise, raw int16 ADC counts if raw is set, volts otherwise.
+        Returns (None, None) if the capture did not complete within max_wait seconds.
+        """
+        try:
+            ratio_mode = mode if isinstance(mode, self.RatioMode) else self.RatioMode[mode.upper()]
+        except KeyError:
+            ratio_mode = None
+        if ratio_mode not in (self.RatioMode.AGGREGATE, self.RatioMode.DECIMATE, self.RatioMode.AVERAGE):
+            raise ValueError('Unsupported downsampling mode {!r}.'.format(mode))
+        if ratio < 1:
+            raise ValueError('Downsampling ratio must be at least 1, got {}.'.format(ratio))
+        if samples is None:
+            samples = self._samples - start
+        if start < 0 or samples < 1 or start + samples > self._samples:
+            raise ValueError('Window of {} samples from {} is outside of the {} captured samples.'.format(
+                samples, start, self._samples))
+        active = [ch for ch in self.channel.values() if ch.active]
+        if not active:
+            raise ValueError('No active channel to fetch.')
+
+        if not self._wait_ready(max_wait):
+            return None, None
+
+        points = -(-samples // ratio)
+        buffer_length = max(points, ChannelInfo.MIN_BUFFER_LENGTH)
+        # as in _do_fetch(), every active channel needs a buffer for the requested mode
+        buffers = {}
+        try:
+            for ch in active:
+                if ratio_mode == self.RatioMode.AGGREGATE:
+                    buffers[ch.idx] = (numpy.empty(buffer_length, dtype=numpy.int16),
+                                       numpy.empty(buffer_length, dtype=numpy.int16))
+                    r = self._api.set_data_buffers(self._handle,
+                                                   ch.idx,
+                                                   *(b.ctypes.data_as(ctypes.POINTER(ctypes.c_int16))
+                                                     for b in buffers[ch.idx]),  # bufferMax, bufferMin
+                                                   buffer_length,
+                                                   0,  # segmentIndex
+                                                   ratio_mode.value)
+                else:
+                    buffers[ch.idx] = numpy.empty(buffer_length, dtype=numpy.int16)
+                    r = self._api.set_data_buffer(self._handle,
+                                                  ch.idx,
+                                                  buffers[ch.idx].ctypes.data_as(ctypes.POINTER(ctypes.c_int16)),
+                                                  buffer_length,
+                                                  0,  # segmentIndex
+                                                  ratio_mode.value)
+                if r != PicoStatus.PICO_OK:
+                    raise PicoScopeException('Setting {} buffer for channel {} failed: {}'.format(
+                        ratio_mode.name, self.CHANNELS[ch.idx], r.name))
+
+            c_no_of_samples = ctypes.c_uint32(points)
+            c_overflow = ctypes.c_int16()
+            r = self._api.get_values(self._handle,
+                                     start,  # startIndex
+                                     c_no_of_samples,
+                                     ratio,
+                                     ratio_mode.value,
+                                     0,  # segmentIndex
+                                     c_overflow)
+            if r != PicoStatus.PICO_OK:
+                raise PicoScopeException('get_values() failed: {}'.format(r.name))
+        finally:
+            if ratio_mode == self.RatioMode.AGGREGATE:
+                # The driver keeps one buffer set per mode, give the aggregate one back to the overflow check in
+                # _do_fetch() before the arrays above are freed.
+                for ch in active:
+                    self._api.set_data_buffers(self._handle,
+                                               ch.idx,
+                                               *ch.min_max_buffers(),  # buffers, bufferLth
+                                               0,  # segmentIndex
+                                               self.RatioMode.AGGREGATE.value)
+
+        points = c_no_of_samples.value
+        result = {}
+        for ch in active:
+            if ratio_mode == self.RatioMode.AGGREGATE:
+                data = tuple(b[:points] if raw else ch.scale(b[:points]) for b in buffers[ch.idx])
+            else:
+                data = buffers[ch.idx][:points]
+                if not raw:
+                    data = ch.scale(data)
+            result[self.CHANNELS[ch.idx]] = (data, bool(c_overflow.value & (1 << ch.idx)))
+
+        # same convention as get_time_axis(): a point is placed in the middle of the raw samples it covers, except
+        # for decimation which returns the first of them
+        pretrig = self.trigger.pretrig if self.trigger is not None else 0
+        first = start + (0.5 if ratio_mode == self.RatioMode.DECIMATE else ratio / 2)
+        time_axis = (first + ratio * numpy.arange(points)) * self._dt - pretrig
+        return result, time_axis
+
+    def _do_fetch(self, max_wait=None):
+        if not self._wait_ready(max_wait):
+            return False
 
         if self._oversample > 1:
             ratio_mode = self.RatioMode.AVERAGE.value
@@ -369,44 +686,46 @@ class Picoscope():
             if r != PicoStatus.PICO_OK:
                 raise PicoScopeException('set_data_buffer() failed: {}'.format(r.name))
 
-        while True:
-            if self.is_ready():
-                c_overflow = ctypes.c_int16()
-                r = self._api.get_values(self._handle,
-                                         0,  # startIndex
-                                         c_no_of_samples,
-                                         self._oversample,
-                                         ratio_mode,
-                                         0,  # segmentIndex
-                                         c_overflow)
-                if r == PicoStatus.PICO_OK:
-                    # Note: the overflow flag reported by Pico library seems to be set only when voltag eexceeds limit
-                    # by some non-negligible margin, not at any arbitrary small overflow.
-                    # Get the minimum and maximum of the measured data to detect overflow by presence of full scale
-                    # reading.
-                    # TODO: do we want to do this, or is it better to use the overflow flag from the Pico library only?
-                    c_single_sample = ctypes.c_uint32(1)
-                    self._api.get_values(self._handle,
-                                         0,  # startIndex
-                                         c_single_sample,
-                                         self._samples,
-                                         self.RatioMode.AGGREGATE.value,
-                                         0,  # segmentIndex
-                                         None)
-                    for ch in self.channel.values():
-                        ch.decode_overflow(c_overflow.value)
-                    self._capture_length = c_no_of_samples.value
-                    # we are done, capture data retrieved
-                    return True
-                if r != PicoStatus.PICO_NO_SAMPLES_AVAILABLE:
-                    raise PicoScopeException('get_values() failed: {}'.format(r.name))
-
-            # wait a moment and try again
-            if max_wait is not None and time.monotonic() > timeout:
-                return False
-            time.sleep(delay)
+        # The scope reported ready, but the driver may still need a moment before the samples can be read.
+        for _ in range(NO_SAMPLES_RETRIES):
+            c_overflow = ctypes.c_int16()
+            r = self._api.get_values(self._handle,
+                                     0,  # startIndex
+                                     c_no_of_samples,
+                                     self._oversample,
+                                     ratio_mode,
+                                     0,  # segmentIndex
+                                     c_overflow)
+            if r != PicoStatus.PICO_NO_SAMPLES_AVAILABLE:
+                break
+            time.sleep(NO_SAMPLES_RETRY_DELAY)
+        if r != PicoStatus.PICO_OK:
+            raise PicoScopeException('get_values() failed: {}'.format(r.name))
+
+        # Note: the overflow flag reported by Pico library seems to be set only when voltag eexceeds limit
+        # by some non-negligible margin, not at any arbitrary small overflow.
+        # Get the minimum and maximum of the measured data to detect overflow by presence of full scale
+        # reading.
+        # TODO: do we want to do this, or is it better to use the overflow flag from the Pico library only?
+        c_single_sample = ctypes.c_uint32(1)
+        self._api.get_values(self._handle,
+                             0,  # startIndex
+                             c_single_sample,
+                             self._samples,
+                             self.RatioMode.AGGREGATE.value,
+                             0,  # segmentIndex
+                             None)
+        for ch in self.channel.values():
+            ch.decode_overflow(c_overflow.value)
+        self._capture_length = c_no_of_samples.value
+        # we are done, capture data retrieved
+        return True
+
+    def fetch(self, max_wait=None, chan=None, out=None, dtype=numpy.float64, raw=False):
+        """Returns (data, overflow) of chan, waiting up to max_wait seconds for the capture.
 
-    def fetch(self, max_wait=None, chan=None):
+        See ChannelInfo.get_data() for out, dtype and raw.
+        """
         ch = self.channel[chan]
         if not ch.active:
             raise ValueError('Can not fetch data for inactive channel {}.'.format(chan))
@@ -417,7 +736,114 @@ class Picoscope():
                 # TODO: handle no data situation somehow better ....?
                 return None, False
 
-        return ch.get_data(self._capture_length)
+        return ch.get_data(self._capture_length, out=out, dtype=dtype, raw=raw)
+
+    def _streaming_interval(self, sample_time):
+        # Pick the finest time unit in which the interval still fits into uint32.
+        for unit, scale in ((self.TimeUnits.NS, 1e9), (self.TimeUnits.US, 1e6),
+                            (self.TimeUnits.MS, 1e3), (self.TimeUnits.S, 1)):
+            interval = int(round(sample_time * scale))
+            if interval <= 0xffffffff:
+                return max(interval, 1), unit, scale
+        raise ValueError('Streaming sample time {} s is too long.'.format(sample_time))
+
+    def stream(self, *, sample_time, chunk_samples, raw=False, max_chunks=None, overview_samples=None,
+               poll_interval=0.01):
+        """Continuous gap-free acquisition of all active channels in streaming mode.
+
+        Generator yielding {channel name: (data, overflow)} for every chunk_samples samples until max_chunks
+        chunks were delivered (forever if None) or the generator is closed. The driver writes into ctypes
+        buffers viewed as NumPy arrays without copying, samples are then assembled into one preallocated chunk
+        array per channel. The yielded arrays are reused, they are only valid until the next chunk is requested,
+        copy them if they need to be kept. Data is raw int16 ADC counts if raw is set, volts otherwise.
+        The actual sample interval chosen by the scope is stored in self._dt.
+        """
+        active = [ch for ch in self.channel.values() if ch.active]
+        if not active:
+            raise ValueError('No active channel to stream.')
+        self.apply()
+        if overview_samples is None:
+            overview_samples = 4 * chunk_samples
+
+        driver_views = {}
+        for ch in active:
+            driver_buffer = (ctypes.c_int16 * overview_samples)()
+            # keep the ctypes object alive as long as the driver may write into it
+            driver_views[ch.idx] = (driver_buffer, numpy.ctypeslib.as_array(driver_buffer))
+            r = self._api.set_data_buffer(self._handle,
+                                          ch.idx,
+                                          driver_buffer,
+                                          overview_samples,
+                                          0,  # segmentIndex
+                                          self.RatioMode.NONE.value)
+            if r != PicoStatus.PICO_OK:
+                raise PicoScopeException('set_data_buffer() failed: {}'.format(r.name))
+
+        interval, unit, scale = self._streaming_interval(sample_time)
+        c_interval = ctypes.c_uint32(interval)
+        r = self._api.run_streaming(self._handle,
+                                    c_interval,
+                                    unit.value,
+                                    0,  # maxPreTriggerSamples
+                                    overview_samples,  # maxPostTriggerSamples (ignored without autoStop)
+                                    0,  # autoStop
+                                    1,  # downSampleRatio
+                                    self.RatioMode.NONE.value,
+                                    overview_samples)
+        if r != PicoStatus.PICO_OK:
+            raise PicoScopeException('Could not start streaming: {}'.format(r.name))
+        self._dt = c_interval.value / scale
+
+        raw_chunks = {ch.idx: numpy.empty(chunk_samples, dtype=numpy.int16) for ch in active}
+        volt_chunks = {ch.idx: numpy.empty(chunk_samples, dtype=numpy.float64) for ch in active}
+        overflow = {ch.idx: False for ch in active}
+        fill = 0
+        chunks = 0
+        pending = []
+
+        def on_ready(handle, no_of_samples, start_index, overflow_bits, trigger_at, triggered, auto_stop, param):
+            # Called from inside get_streaming_latest_values() in this thread, just note the new block.
+            pending.append((start_index, no_of_samples, overflow_bits))
+
+        callback = self.StreamingReady(on_ready)
+        try:
+            while max_chunks is None or chunks < max_chunks:
+                r = self._api.get_streaming_latest_values(self._handle, callback, None)
+                if r not in (PicoStatus.PICO_OK, PicoStatus.PICO_BUSY):
+                    raise PicoScopeException('get_streaming_latest_values() failed: {}'.format(r.name))
+                if not pending:
+                    time.sleep(poll_interval)
+                    continue
+
+                blocks = pending[:]
+                pending.clear()
+                for start_index, no_of_samples, overflow_bits in blocks:
+                    done = 0
+                    while done < no_of_samples:
+                        n = min(no_of_samples - done, chunk_samples - fill)
+                        for ch in active:
+                            view = driver_views[ch.idx][1]
+                            raw_chunks[ch.idx][fill:fill + n] = view[start_index + done:start_index + done + n]
+                            overflow[ch.idx] |= bool(overflow_bits & (1 << ch.idx))
+                        fill += n
+                        done += n
+                        if fill < chunk_samples:
+                            continue
+
+                        result = {}
+                        for ch in active:
+                            data = raw_chunks[ch.idx] if raw else ch.scale(raw_chunks[ch.idx], out=volt_chunks[ch.idx])
+                            result[self.CHANNELS[ch.idx]] = (data, overflow[ch.idx])
+                            overflow[ch.idx] = False
+                        fill = 0
+                        chunks += 1
+                        yield result
+                        if max_chunks is not None and chunks >= max_chunks:
+                            return
+        finally:
+            self.stop()
+            # the block mode buffers are set again by the next fetch
+            self._capture_length = None
 
     def _check_timebase(self, timebase_id, sample_time=None, duration=None, samples=None):
         """Check if given timebase id can fulfill requested sample time and record duration.
@@ -505,12 +931,34 @@ class Picoscope():
         return (1, timebase_id, need_samples, oversample_factor, dt)
 
     def _find_timebase(self, sample_time=None, duration=None, samples=None):
+        """Cached _search_timebase().
+
+        The available timebases depend on the set of active channels only (not on their range, coupling or offset),
+        so that set is part of the key and activating or deactivating channels never reuses a stale result. The set
+        is taken from what the scope was actually sent, that is what _check_timebase() probes.
+        """
+        active = tuple(idx for idx, state in sorted(self._channel_state.items()) if state[0])
+        key = (active, sample_time, duration, samples)
+        result = self._timebase_cache.get(key)
+        if result is None:
+            result = self._search_timebase(sample_time=sample_time, duration=duration, samples=samples)
+            self._timebase_cache[key] = result
+        return result
+
+    def _search_timebase(self, sample_time=None, duration=None, samples=None):
         """Run binary search to find the best suitable (including oversampling) timebase ID."""
         # TODO: should we allow request specifying oversampling explicitely or requiring no oversampling at all?
 
         # two initial points
         check_a = self._check_timebase(0, sample_time, duration, samples)
-        check_b = self._check_timebase(0xffffffff, sample_time, duration, samples)
+        # The answer is at or below the timebase sampling at the requested rate without oversampling, so start the
+        # upper point there (from the published timebase formulas) instead of at 0xffffffff, and only move it up
+        # while it is still too fast.
+        upper = min(max(self.timebase_for_interval(sample_time or duration / samples), 1), 0xffffffff)
+        check_b = self._check_timebase(upper, sample_time, duration, samples)
+        while check_b[0] < 1 and check_b[1] < 0xffffffff:
+            check_a = check_b
+            check_b = self._check_timebase(min(check_b[1] * 2, 0xffffffff), sample_time, duration, samples)
         # theoretically, check results should look like this:
         #
         # tbase_id: 0.................................................................0xffffffff
@@ -551,7 +999,7 @@ class Picoscope():
                               self._capture_length * self._downsampled_dt - pretrig + self._downsampled_dt / 2,
                               self._capture_length,
                               endpoint=False,
-                              dtype=numpy.dtype('float_'))
+                              dtype=numpy.float64)
 
 
 def main():
@@ -1,5 +1,7 @@
-from ctypes import POINTER, c_uint32, c_int16, c_int32, c_void_p, c_char_p, c_float
+from ctypes import POINTER, CFUNCTYPE, c_uint32, c_int16, c_int32, c_int64, c_void_p, c_char_p, c_float
 from enum import Enum, unique
+import math
+import sys
 from .pico_status import PicoStatus
 
 LIBRARY = 'ps3000a'
@@ -39,6 +41,50 @@ class RatioMode(Enum):
     AVERAGE = 4
 
 
+@unique
+class TimeUnits(Enum):
+    FS = 0
+    PS = 1
+    NS = 2
+    US = 3
+    MS = 4
+    S = 5
+
+
+def timebase_for_interval(interval):
+    """Highest timebase id with sample interval not above interval seconds.
+
+    Uses the programmer's guide formulas of the 1 GS/s (e.g. 3404/3405/3406) models, 2^n / 1e9 for n < 3 and
+    (n - 2) / 125e6 above, so it is only a starting point for the timebase search on other models.
+    """
+    if interval < 4e-9:
+        return max(0, int(math.log2(max(interval * 1e9, 1))))
+    return int(interval * 125e6) + 2
+
+
+# The library uses stdcall on Windows, so callbacks have to as well.
+if sys.platform == 'win32':
+    from ctypes import WINFUNCTYPE as CALLBACK_FUNCTYPE
+else:
+    CALLBACK_FUNCTYPE = CFUNCTYPE
+
+# Callback prototypes
+BlockReady = CALLBACK_FUNCTYPE(None,
+                               c_int16,   # handle
+                               c_uint32,  # status (PICO_STATUS)
+                               c_void_p)  # pParameter
+
+StreamingReady = CALLBACK_FUNCTYPE(None,
+                                   c_int16,   # handle
+                                   c_int32,   # noOfSamples
+                                   c_uint32,  # startIndex
+                                   c_int16,   # overflow
+                                   c_uint32,  # triggerAt
+                                   c_int16,   # triggered
+                                   c_int16,   # autoStop
+                                   c_void_p)  # pParameter
+
+
 # Function definitions:
 #  - keyword is python call name
 #  - data tuple:
@@ -96,7 +142,7 @@ FUNCTION = {
         (c_int16, 'oversample'),
         (POINTER(c_int32), 'timeIndisposedMs'),
         (c_uint32, 'segmentIndex'),
-        (c_void_p, 'lpReady'),  # TODO?
+        (BlockReady, 'lpReady'),
         (c_void_p, 'pParameter')]),
     'set_data_buffer': (PicoStatus, 'ps3000aSetDataBuffer', [
         (c_int16, 'handle'),
@@ -121,4 +167,42 @@ FUNCTION = {
         (c_int32, 'downSampleRatioMode'),
         (c_uint32, 'segmentIndex'),
         (POINTER(c_int16), 'overflow')]),
+    'run_streaming': (PicoStatus, 'ps3000aRunStreaming', [
+        (c_int16, 'handle'),
+        (POINTER(c_uint32), 'sampleInterval'),
+        (c_int32, 'sampleIntervalTimeUnits'),
+        (c_uint32, 'maxPreTriggerSamples'),
+        (c_uint32, 'maxPostTriggerSamples'),
+        (c_int16, 'autoStop'),
+        (c_uint32, 'downSampleRatio'),
+        (c_int32, 'downSampleRatioMode'),
+        (c_uint32, 'overviewBufferSize')]),
+    'get_streaming_latest_values': (PicoStatus, 'ps3000aGetStreamingLatestValues', [
+        (c_int16, 'handle'),
+        (StreamingReady, 'lpPs3000aReady'),
+        (c_void_p, 'pParameter')]),
+    'no_of_streaming_values': (PicoStatus, 'ps3000aNoOfStreamingValues', [
+        (c_int16, 'handle'),
+        (POINTER(c_uint32), 'noOfValues')]),
+    'memory_segments': (PicoStatus, 'ps3000aMemorySegments', [
+        (c_int16, 'handle'),
+        (c_uint32, 'nSegments'),
+        (POINTER(c_int32), 'nMaxSamples')]),
+    'set_no_of_captures': (PicoStatus, 'ps3000aSetNoOfCaptures', [
+        (c_int16, 'handle'),
+        (c_uint32, 'nCaptures')]),
+    'get_values_bulk': (PicoStatus, 'ps3000aGetValuesBulk', [
+        (c_int16, 'handle'),
+        (POINTER(c_uint32), 'noOfSamples'),
+        (c_uint32, 'fromSegmentIndex'),
+        (c_uint32, 'toSegmentIndex'),
+        (c_uint32, 'downSampleRatio'),
+        (c_int32, 'downSampleRatioMode'),
+        (POINTER(c_int16), 'overflow')]),
+    'get_values_trigger_time_offset_bulk64': (PicoStatus, 'ps3000aGetValuesTriggerTimeOffsetBulk64', [
+        (c_int16, 'handle'),
+        (POINTER(c_int64), 'times'),
+        (POINTER(c_int32), 'timeUnits'),
+        (c_uint32, 'fromSegmentIndex'),
+        (c_uint32, 'toSegmentIndex')]),
 }
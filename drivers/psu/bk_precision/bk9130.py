@@ -1,5 +1,6 @@
 from ...psu.psu_interface import PSUInterface
 from ...common import scpi_commands as cmds
+from ...command_queue import serialised
 
 
 class PSUInterface9130(PSUInterface):
@@ -18,28 +19,34 @@ class PSUInterface9130(PSUInterface):
             raise ValueError
         self._write(f'INST:NSEL {chan}')  # TODO try out.
 
+    @serialised
     def get_current(self, chan=None):
         self._sel_chan(chan)
         return self.resource.query('MEAS:CURR?')
 
+    @serialised
     def get_voltage(self, chan=None):
         self._sel_chan(chan)
         return self.resource.query('MEAS:VOLT?')
 
+    @serialised
     def set_voltage(self, volts, chan=None):
         self._sel_chan(chan)
         volts *= 1000.0
         self._write('VOLT %imV' % volts)
 
+    @serialised
     def set_current(self, amps, chan=None):
         self._sel_chan(chan)
         amps *= 1000.0
         self._write('CURR %imA')
 
+    @serialised
     def switch_on(self, chan=None):
         self._sel_chan(chan)
         self._write('OUTP 1')
 
+    @serialised
     def switch_off(self, chan=None):
         self._sel_chan(chan)
         self._write('OUTP 0')
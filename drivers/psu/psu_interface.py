@@ -1,8 +1,10 @@
 from typing import IO
 from ..base_instrument_interface import BaseInterface
+from ..async_interface import AsyncPSUMixin
+from ..command_queue import serialised
 
 
-class PSUInterface(BaseInterface):
+class PSUInterface(BaseInterface, AsyncPSUMixin):
 
     def set_local(self):
         raise NotImplementedError
@@ -37,4 +39,41 @@ class PSUInterface(BaseInterface):
         raise NotImplementedError
 
     def is_switched_on(self, chan=None):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    @serialised
+    def snapshot(self, chans=None):
+        """
+        Returns the state of every channel as one record:
+            {chan: {"voltage", "current", "set_voltage", "set_current", "enabled"}}
+        Drivers should override this to batch the queries into as few
+        transactions as the instrument allows, this fallback queries each
+        value separately. Values a driver does not support are None.
+        """
+        chans = self.channels if chans is None else chans
+        getters = {
+            "voltage": self.get_voltage,
+            "current": self.get_current,
+            "set_voltage": self.query_set_voltage,
+            "set_current": self.query_set_current,
+            "enabled": self.is_switched_on,
+        }
+        status = {}
+        for chan in chans:
+            status[chan] = {}
+            for key, getter in getters.items():
+                try:
+                    status[chan][key] = getter(chan)
+                except NotImplementedError:
+                    status[chan][key] = None
+        return status
+
+    def _status_record(self, voltage, current, set_voltage, set_current, enabled):
+        """Builds one snapshot() record from the raw replies of a batched query."""
+        return {
+            "voltage": self.response_to_float(voltage),
+            "current": self.response_to_float(current),
+            "set_voltage": self.response_to_float(set_voltage),
+            "set_current": self.response_to_float(set_current),
+            "enabled": int(enabled) == 1,
+        }
@@ -1,7 +1,31 @@
+import threading
+import time
 from ...psu.psu_interface import PSUInterface
 from ...common import scpi_commands as cmds
+from ...command_queue import serialised
 
 
+class _Selection:
+    """Output selection state of one instrument session."""
+    def __init__(self):
+        # Output the instrument is known to have selected, None if unknown.
+        self.channel = None
+        self.needs_verify = True
+        self.last_verified = 0.0
+
+
+# Keyed like the command queues (resource name), so every driver object
+# sharing a pooled session sees the same selection.
+_selections = {}
+_selections_lock = threading.Lock()
+
+
+def _get_selection(key):
+    with _selections_lock:
+        selection = _selections.get(key)
+        if selection is None:
+            selection = _selections[key] = _Selection()
+        return selection
 
 
 class PSUInterfaceHMP4030(PSUInterface):
@@ -12,41 +36,125 @@ class PSUInterfaceHMP4030(PSUInterface):
         2: "OUT2",
         3: "OUT3"
     }
-    
+
+    def __init__(self, **kwargs):
+        # Seconds between INST? verifications of the selected output,
+        # None only verifies after an error, 0 verifies every selection.
+        self.verify_interval = kwargs.pop('verify_interval', None)
+        super().__init__(**kwargs)
+        self._selection = _get_selection(self._command_queue_key())
+        # Do not trust a selection made before this driver was created.
+        self._invalidate_channel()
+
+    def _invalidate_channel(self):
+        self._selection.channel = None
+        self._selection.needs_verify = True
+
+    def _forget_selection(self, _str):
+        # Any command that may change the selected output (e.g. a custom
+        # 'INST OUT2' or '*RST'), the callers that select on purpose record
+        # the new selection afterwards.
+        command = _str.upper()
+        if 'INST' in command or '*RST' in command:
+            self._selection.channel = None
+
+    @serialised
+    def _query(self, _str):
+        self._forget_selection(_str)
+        try:
+            return super()._query(_str)
+        except IOError:
+            self._invalidate_channel()
+            raise
+
+    @serialised
+    def _write(self, _str):
+        self._forget_selection(_str)
+        try:
+            return super()._write(_str)
+        except IOError:
+            self._invalidate_channel()
+            raise
+
+    def _verify_due(self):
+        if self._selection.needs_verify:
+            return True
+        if self.verify_interval is None:
+            return False
+        return time.monotonic() - self._selection.last_verified >= self.verify_interval
+
     def _set_channel(self, chan):
         if chan not in self.channels:
             raise ValueError(
                 f'Error: No channel specified on {self._model}'
             )
+        verify = self._verify_due()
+        if chan == self._selection.channel and not verify:
+            return  # Already selected, skip the INST round trip.
+
         self._write(f"INST {self.CHAN_STRINGS[chan]}")
-        # This command returns OUTP1 instead of OUT1
-        ret_val = self._query(f'INST?').replace('P', '').replace('\n', '')
+        if verify:
+            # This command returns OUTP1 instead of OUT1
+            ret_val = self._query(f'INST?').replace('P', '').replace('\n', '')
+
+            if ret_val != self.CHAN_STRINGS[chan]:
+                self._invalidate_channel()
+                raise IOError(
+                    f"Error: Setting channel on {self._model} Failed"
+                )
+            self._selection.needs_verify = False
+            self._selection.last_verified = time.monotonic()
+        self._selection.channel = chan
 
-        if ret_val != self.CHAN_STRINGS[chan]:
-            raise IOError(
-                f"Error: Setting channel on {self._model} Failed"
+    @serialised
+    def snapshot(self, chans=None):
+        """
+        Readings, setpoints and output state with one combined query per
+        output (select + all values).
+        """
+        chans = self.channels if chans is None else chans
+        status = {}
+        for chan in chans:
+            if chan not in self.channels:
+                raise ValueError(
+                    f'Error: No channel specified on {self._model}'
+                )
+            reply = self._query(
+                f"INST {self.CHAN_STRINGS[chan]};:MEAS:VOLT?;:MEAS:CURR?;:VOLT?;:CURR?;:OUTP:STAT?"
             )
+            self._selection.channel = chan
+            replies = reply.strip().split(';')
+            if len(replies) != 5:
+                raise IOError(f"Error: {self._model} returned {len(replies)} of 5 replies")
+            status[chan] = self._status_record(*replies)
+        return status
 
+    @serialised
     def get_current(self, chan=None):
         self._set_channel(chan)        
         return self.response_to_float(self._query('MEAS:CURR?'))
 
+    @serialised
     def get_voltage(self, chan=None):
         self._set_channel(chan)        
         return self.response_to_float(self._query('MEAS:VOLT?'))
 
+    @serialised
     def query_set_voltage(self, chan):
         self._set_channel(chan)
         return self.response_to_float(self._query('VOLT?'))
 
+    @serialised
     def query_set_current(self, chan):
         self._set_channel(chan)
         return self.response_to_float(self._query('CURR?'))
 
+    @serialised
     def set_voltage(self, volts, chan):
         self._set_channel(chan)
         self._write(f"VOLT {volts}")
 
+    @serialised
     def set_current(self, amps, chan):
         self._set_channel(chan)
         self._write(f"CURR {amps}")
@@ -54,10 +162,12 @@ class PSUInterfaceHMP4030(PSUInterface):
     def get_identity(self):
         return self._query(cmds.SCPI_IDENTIFY)
 
+    @serialised
     def switch_on(self, chan):
         self._set_channel(chan)
         self._write('OUTP 1')
 
+    @serialised
     def switch_off(self, chan):
         self._set_channel(chan)
         self._write('OUTP 0')
@@ -56,5 +56,23 @@ class PSUInterfaceMX100TP(PSUInterface):
         return int(self._query(f"OP{chan}?")) == 1
 
 
+    def snapshot(self, chans=None):
+        """All channels' readings, setpoints and output state in one transaction."""
+        chans = self.channels if chans is None else chans
+        queries = []
+        for chan in chans:
+            if chan not in self.channels:
+                raise ValueError
+            queries.extend([f"V{chan}O?", f"I{chan}O?", f"V{chan}?", f"I{chan}?", f"OP{chan}?"])
+        # TTi instruments accept several commands in one message separated by ';'
+        # and return the replies in the same order, also separated by ';'.
+        replies = [reply.strip() for reply in self._query(';'.join(queries)).split(';')]
+        if len(replies) != len(queries):
+            raise IOError(f"Error: {self._model} returned {len(replies)} of {len(queries)} replies")
+        status = {}
+        for i, chan in enumerate(chans):
+            status[chan] = self._status_record(*replies[i * 5:(i + 1) * 5])
+        return status
+
     def set_local(self):
         self._write('LOCAL')
@@ -20,19 +20,34 @@ class PSUInterfaceQL355P(PSUInterface):
         return self.response_to_float(self._query('V1?'))
 
     def set_voltage(self, volts):
-        self.resource.write("V1 {:f}".format(volts))
+        self._write("V1 {:f}".format(volts))
 
     def set_current(self, amps):
-        self.resource.write("I1 {:f}".format(amps))
+        self._write("I1 {:f}".format(amps))
 
     def get_identity(self):
         return self._query(cmds.SCPI_IDENTIFY)
 
     def switch_on(self):
-        self.resource.write('OP1 1')
+        self._write('OP1 1')
 
     def switch_off(self):
-        self.resource.write('OP1 0')
+        self._write('OP1 0')
+
+    def snapshot(self, chans=None):
+        """Readings, setpoints and output state in one transaction."""
+        chans = self.channels if chans is None else chans
+        for chan in chans:
+            if chan not in self.channels:
+                raise ValueError
+        if not chans:
+            return {}
+        # TTi multi-command syntax: ';' separated commands and replies.
+        reply = self._query('V1O?;I1O?;V1?;I1?;OP1?')
+        replies = [value.strip() for value in reply.split(';')]
+        if len(replies) != 5:
+            raise IOError(f"Error: {self._model} returned {len(replies)} of 5 replies")
+        return {1: self._status_record(*replies)}
 
     def set_local(self):
-        self.resource.write('LOCAL')
+        self._write('LOCAL')
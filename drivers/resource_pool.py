@@ -0,0 +1,97 @@
+import atexit
+import threading
+import pyvisa
+from pyvisa.errors import VisaIOError
+
+# Seconds an unused session stays open before it is closed. Keeping it open
+# for a while lets back to back scripts/scans reuse the session.
+DEFAULT_IDLE_TIMEOUT = 30
+
+_resource_manager = None
+_resource_manager_lock = threading.Lock()
+
+
+def get_resource_manager():
+    """Returns the process wide pyvisa ResourceManager, creating it on first use."""
+    global _resource_manager
+    with _resource_manager_lock:
+        if _resource_manager is None:
+            _resource_manager = pyvisa.ResourceManager()
+        return _resource_manager
+
+
+class ResourcePool:
+    """
+    Reference counted pool of open VISA sessions keyed by resource name.
+    acquire() hands out an already open session if there is one, release()
+    drops a reference and closes the session once it has been idle for
+    idle_timeout seconds (immediately if idle_timeout is 0 or None).
+    """
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._lock = threading.RLock()
+        self._sessions = {}
+        self._refcount = {}
+        self._idle_timers = {}
+
+    def acquire(self, resource_name):
+        with self._lock:
+            self._cancel_idle_timer(resource_name)
+            session = self._sessions.get(resource_name)
+            if session is None:
+                try:
+                    session = get_resource_manager().open_resource(resource_name)
+                except VisaIOError as err:
+                    raise IOError(err)  # Resource is busy or non-existent.
+                self._sessions[resource_name] = session
+                self._refcount[resource_name] = 0
+            self._refcount[resource_name] += 1
+            return session
+
+    def release(self, resource_name):
+        with self._lock:
+            if resource_name not in self._refcount:
+                return
+            self._refcount[resource_name] = max(self._refcount[resource_name] - 1, 0)
+            if self._refcount[resource_name] > 0:
+                return
+            if not self.idle_timeout:
+                self._close(resource_name)
+                return
+            timer = threading.Timer(self.idle_timeout, self._close_if_idle, args=(resource_name,))
+            timer.daemon = True
+            self._idle_timers[resource_name] = timer
+            timer.start()
+
+    def refcount(self, resource_name):
+        with self._lock:
+            return self._refcount.get(resource_name, 0)
+
+    def close_all(self):
+        with self._lock:
+            for resource_name in list(self._sessions):
+                self._close(resource_name)
+
+    def _cancel_idle_timer(self, resource_name):
+        timer = self._idle_timers.pop(resource_name, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _close_if_idle(self, resource_name):
+        with self._lock:
+            if self._refcount.get(resource_name, 0) == 0:
+                self._close(resource_name)
+
+    def _close(self, resource_name):
+        self._cancel_idle_timer(resource_name)
+        self._refcount.pop(resource_name, None)
+        session = self._sessions.pop(resource_name, None)
+        if session is not None:
+            try:
+                session.close()
+            except VisaIOError:
+                pass
+
+
+RESOURCE_POOL = ResourcePool()
+atexit.register(RESOURCE_POOL.close_all)
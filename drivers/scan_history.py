@@ -0,0 +1,88 @@
+import json
+import platform
+import threading
+from .common.json_file import default_json_path, load_json_file, save_json_file
+
+# Location of the scan statistics file, can be overridden with an env variable.
+DEFAULT_HISTORY_PATH = default_json_path('ATE_SCAN_HISTORY', '.ate_scan_history.json')
+
+# Ports which answered to nothing in this many consecutive scans get skipped.
+DEFAULT_SILENT_SCANS = 3
+
+
+class ScanHistory:
+    """
+    Per-host statistics of which (baud, terminator) pairs matched a supported
+    device, and of resources which never answered. Used to reorder the probe
+    sequence by hit rate and to skip ports that are known to be silent.
+
+    File format (one section per host name):
+        {
+            "<host>": {
+                "hits": {"<baud>|<terminator>": <count>},
+                "silent": {"<resource>": <consecutive silent scans>}
+            }
+        }
+    """
+    def __init__(self, path=None, silent_scans=DEFAULT_SILENT_SCANS, host=None):
+        self.path = path if path is not None else DEFAULT_HISTORY_PATH
+        self.silent_scans = silent_scans
+        self.host = host if host is not None else platform.node()
+        self._lock = threading.Lock()
+        self._data = {}
+        self.load()
+
+    @staticmethod
+    def _key(baud, term):
+        return f"{baud}|{term}"
+
+    def _host_data(self):
+        return self._data.setdefault(self.host, {'hits': {}, 'silent': {}})
+
+    def load(self):
+        self._data = load_json_file(self.path)
+
+    def save(self):
+        with self._lock:
+            # deep copy, the per-host dicts are updated in place
+            data = json.loads(json.dumps(self._data))
+        save_json_file(self.path, data, "scan history")
+
+    def probe_order(self, bauds, terms):
+        """
+        Returns every (baud, terminator) pair ordered by observed hit count.
+        Ties keep the given order so unseen pairs follow the default guesses.
+        """
+        with self._lock:
+            hits = dict(self._host_data()['hits'])
+        pairs = [(baud, term) for baud in bauds for term in terms]
+        return sorted(pairs, key=lambda pair: -hits.get(self._key(*pair), 0))
+
+    def record_hit(self, resource, baud, term):
+        with self._lock:
+            host_data = self._host_data()
+            key = self._key(baud, term)
+            host_data['hits'][key] = host_data['hits'].get(key, 0) + 1
+            host_data['silent'].pop(resource, None)
+
+    def record_answered(self, resource):
+        with self._lock:
+            self._host_data()['silent'].pop(resource, None)
+
+    def record_silent(self, resource):
+        with self._lock:
+            silent = self._host_data()['silent']
+            silent[resource] = silent.get(resource, 0) + 1
+
+    def should_skip(self, resource):
+        with self._lock:
+            count = self._host_data()['silent'].get(resource, 0)
+        return count >= self.silent_scans
+
+    def rescan(self, resource=None):
+        """Forget silent port history so the port(s) are probed again."""
+        with self._lock:
+            if resource is None:
+                self._host_data()['silent'] = {}
+            else:
+                self._host_data()['silent'].pop(resource, None)
@@ -0,0 +1,158 @@
+import threading
+import time
+import numpy
+
+from .command_queue import PRIORITY_BULK
+
+
+class RingBuffer:
+    """
+    Fixed size sample store: one float64 timestamp column plus one float64
+    column per channel, all preallocated. Only the logger thread writes;
+    readers never take a lock, they copy and then check that the writer did
+    not overwrite what they copied. Because the slot being written is never
+    trusted, readers see at most the last capacity - 1 samples.
+
+    Every sample gets a sequence number (0, 1, 2, ...). Readers keep the
+    sequence number returned by read_since() to fetch only new samples.
+    """
+    def __init__(self, capacity, n_columns):
+        self.capacity = capacity
+        self._timestamps = numpy.zeros(capacity, dtype=numpy.float64)
+        self._data = numpy.full((capacity, n_columns), numpy.nan, dtype=numpy.float64)
+        self._count = 0  # total number of samples ever written
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def count(self):
+        return self._count
+
+    def append(self, timestamp, values):
+        idx = self._count % self.capacity
+        self._timestamps[idx] = timestamp
+        self._data[idx] = values
+        # Publish only after the row is complete.
+        self._count += 1
+
+    def read_since(self, seq=0):
+        """
+        Returns (timestamps, values, next_seq) with copies of every sample
+        whose sequence number is >= seq and which is still in the buffer.
+        """
+        end = self._count
+        start = max(seq, end - self.capacity)
+        if start >= end:
+            return self._timestamps[:0].copy(), self._data[:0].copy(), end
+        indices = numpy.arange(start, end) % self.capacity
+        timestamps = self._timestamps[indices]
+        values = self._data[indices]
+        # Samples overwritten while copying are dropped from the front. The
+        # slot at _count % capacity may be half written by append() before
+        # _count is incremented, so it counts as overwritten already: at most
+        # capacity - 1 rows are ever returned as valid.
+        overwritten = self._count + 1 - self.capacity - start
+        if overwritten > 0:
+            timestamps = timestamps[overwritten:]
+            values = values[overwritten:]
+        return timestamps, values, end
+
+    def snapshot(self):
+        timestamps, values, _ = self.read_since(0)
+        return timestamps, values
+
+
+class TelemetryLogger:
+    """
+    Background acquisition of PSU/Load/DMM readings at a fixed rate into a
+    RingBuffer, e.g.
+
+        logger = TelemetryLogger(rate=10, capacity=864000)
+        logger.add_channel("psu_v1", psu, "get_voltage", 1)
+        logger.add_channel("dmm_t5", dmm, "get_temperature", 5)
+        logger.start()
+        ...
+        timestamps, values, seq = logger.read_since(seq)
+
+    Timestamps are time.monotonic(). All channels of one sample are requested
+    at once through each instrument's command queue (bulk priority), so
+    different instruments are read in parallel and interactive commands still
+    get through. Failed readings are stored as NaN, counted in errors and the
+    last exception is kept in last_error.
+    """
+    def __init__(self, rate=1.0, capacity=100000):
+        self.rate = rate
+        self.capacity = capacity
+        self.columns = []
+        self._channels = []
+        self.buffer = None
+        self.overruns = 0  # samples that took longer than the sample period
+        self.errors = 0  # failed readings, stored as NaN
+        self.last_error = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def add_channel(self, name, device, method, *args):
+        """Logs device.<method>(*args) as column name."""
+        if self._thread is not None:
+            raise RuntimeError("Can not add channels while the logger is running")
+        self.columns.append(name)
+        self._channels.append((device, getattr(device, method), args))
+
+    def start(self):
+        if self._thread is not None:
+            return
+        if not self._channels:
+            raise ValueError("No channels to log")
+        if self.buffer is None or self.buffer._data.shape[1] != len(self._channels):
+            self.buffer = RingBuffer(self.capacity, len(self._channels))
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry-logger", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def read_since(self, seq=0):
+        return self.buffer.read_since(seq)
+
+    def snapshot(self):
+        return self.buffer.snapshot()
+
+    def _sample(self, row):
+        futures = [
+            device.submit(method, *args, priority=PRIORITY_BULK)
+            for device, method, args in self._channels
+        ]
+        for i, future in enumerate(futures):
+            try:
+                row[i] = future.result()
+            except Exception as err:
+                # Any failure, not just I/O or parsing (e.g. a method the
+                # instrument does not implement), must not end the logger.
+                row[i] = numpy.nan
+                self.errors += 1
+                self.last_error = err
+
+    def _run(self):
+        period = 1.0 / self.rate
+        row = numpy.empty(len(self._channels), dtype=numpy.float64)
+        next_sample = time.monotonic()
+        while not self._stop.is_set():
+            timestamp = time.monotonic()
+            self._sample(row)
+            self.buffer.append(timestamp, row)
+
+            # Schedule on a fixed grid so the rate does not drift, skip
+            # missed slots instead of bursting to catch up.
+            next_sample += period
+            now = time.monotonic()
+            if now > next_sample:
+                self.overruns += 1
+                next_sample = now
+            self._stop.wait(next_sample - now)
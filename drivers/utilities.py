@@ -1,14 +1,26 @@
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 import pyvisa
 from pyvisa.errors import VisaIOError
 from serial import SerialException
 from .common import scpi_commands as cmds
-from .devices import DICT_DEVICES_MODEL
+from .devices import DICT_DEVICES_MODEL, DICT_DEVICES, IDENTITY_MATCHER
+from .discovery_cache import DiscoveryCache
+from .scan_history import ScanHistory
+from .resource_pool import RESOURCE_POOL, get_resource_manager
 
 
-def list_devices():
-    rm = pyvisa.ResourceManager()
+# resource name -> (identity, weakref to driver) of drivers created by scans
+_scanned_drivers = {}
+
+
+def list_devices(skip_in_use=False):
+    rm = get_resource_manager()
     devices = []
     for resource in rm.list_resources():
+        if skip_in_use and RESOURCE_POOL.refcount(resource) > 0:
+            continue
         try:
             devices.append(open_resource(resource))
         except (VisaIOError, SerialException, IOError):
@@ -17,21 +29,51 @@ def list_devices():
     return devices
 
 def open_resource(resource):
-    rm = pyvisa.ResourceManager()
-    try:
-        return rm.open_resource(resource)
-    except pyvisa.VisaIOError as err:
-        raise IOError(err)  # Resource is busy or non-existent.
-
-def scan_devices(scan_aardvarks=False, aardvark_in_gpio_mode=False):
-    devices = list_devices()
-    supported_devices = {}    
-    supported_devices.update(find_device_interface(devices))
+    # Sessions are shared through the pool, call close_resource() when done.
+    return RESOURCE_POOL.acquire(resource)
+
+def close_resource(resource):
+    RESOURCE_POOL.release(resource)
+
+def scan_devices(scan_aardvarks=False, aardvark_in_gpio_mode=False, max_workers=None,
+                 resource_timeout=None, use_cache=True, cache_max_age=None, use_history=True,
+                 rescan=False):
+    # Sessions already owned by live drivers are never probed again, the
+    # probe sweep would disturb their traffic.
+    devices = list_devices(skip_in_use=True)
+    cache = DiscoveryCache(max_age=cache_max_age) if use_cache else None
+    history = ScanHistory() if use_history else None
+    if history is not None and rescan:
+        history.rescan()
+    supported_devices = _drivers_in_use()
+    found = find_device_interface(devices, max_workers=max_workers, resource_timeout=resource_timeout,
+                                  cache=cache, history=history)
+    for identity, interface in found.items():
+        _scanned_drivers[interface.resource.resource_name] = (identity, weakref.ref(interface))
+    supported_devices.update(found)
+    if cache is not None:
+        cache.save()
+    if history is not None:
+        history.save()
     if scan_aardvarks:
         supported_devices.update(scan_aardvarks(aardvark_in_gpio_mode))
     print(f"Supported devices: {supported_devices}")
     return supported_devices
 
+def _drivers_in_use():
+    """{identity: driver} of drivers from earlier scans that still hold their session."""
+    drivers = {}
+    for resource_name, (identity, ref) in list(_scanned_drivers.items()):
+        interface = ref()
+        if interface is None or interface.resource is None:
+            del _scanned_drivers[resource_name]
+            if interface is None:
+                # Dropped without close(), give back the reference it held.
+                close_resource(resource_name)
+        elif RESOURCE_POOL.refcount(resource_name) > 0:
+            drivers[identity] = interface
+    return drivers
+
 def scan_aardvarks(is_gpio_mode=False):
     from .devices import AardvarkGPIO, AardvarkI2CSPI, Aardvark
     supported_devices = {}
@@ -44,41 +86,129 @@ def scan_aardvarks(is_gpio_mode=False):
     return supported_devices
 
 def get_interface_by_identity(identity):
-    for model, interface in DICT_DEVICES_MODEL.items():
-        if model in identity:
-            print(f"Found supported device: {identity}")
-            return interface
-    return None
+    model = IDENTITY_MATCHER.match(identity)
+    if model is None:
+        return None
+    print(f"Found supported device: {identity}")
+    return DICT_DEVICES_MODEL[model]
 
 # PyVisa searches using baud 9600. some devices could be any baud and any line endings. 
-def find_device_interface(devices):
+# in order of most to least likely. 
+BAUD_TO_TRY = [9600, 115200, 19200, 57600, 38400, 4800, 2400, 1200, 600, 300]
+READ_TERM_TO_TRY = ['\n', '\r', '\r\n']
+PROBE_TIMEOUT_MS = 200  # Reduce timeout to reduce time the scan takes
+DEFAULT_TIMEOUT_MS = 2000
+MAX_SCAN_WORKERS = 8
+
+
+def _flush_device(device):
+    device.flush(pyvisa.constants.VI_READ_BUF)
+    device.flush(pyvisa.constants.VI_WRITE_BUF)
+
+
+def _probe_cached(device, entry):
+    # Single *IDN? using the settings that worked last time.
+    interface = DICT_DEVICES.get(entry['driver'])
+    if interface is None:
+        return None
+    try:
+        device.baud_rate = entry['baud_rate']
+        device.read_termination = entry['read_termination']
+        identity = device.query(cmds.SCPI_IDENTIFY)
+    except VisaIOError:
+        _flush_device(device)
+        return None
+    if identity != entry['identity']:
+        _flush_device(device)
+        return None
+    print(f"Found cached device: {identity}")
+    device.timeout = DEFAULT_TIMEOUT_MS
+    return identity, interface(resource=device)
+
+
+def probe_device(device, resource_timeout=None, cache=None, history=None):
+    """
+    Tries every baud/terminator combination on a single resource until an
+    *IDN? reply matches a supported driver. Gives up once resource_timeout
+    seconds have been spent on this resource (None means no limit).
+    If a cache entry exists for the resource it is validated first and the
+    full sweep only runs on a mismatch. With a scan history the sweep is
+    ordered by past hit rate and known silent ports are skipped.
+    Returns (identity, interface instance) or None.
+    """
+    resource_name = device.resource_name
+    if history is not None and history.should_skip(resource_name):
+        print(f"Skipping {resource_name}, no answer in the last {history.silent_scans} scans")
+        return None
+
+    device.timeout = PROBE_TIMEOUT_MS
+    if cache is not None:
+        entry = cache.get(resource_name)
+        if entry is not None:
+            result = _probe_cached(device, entry)
+            if result is not None:
+                if history is not None:
+                    history.record_hit(resource_name, entry['baud_rate'], entry['read_termination'])
+                return result
+            cache.invalidate(resource=resource_name)
+
+    if history is not None:
+        probe_order = history.probe_order(BAUD_TO_TRY, READ_TERM_TO_TRY)
+    else:
+        probe_order = [(baud, term) for baud in BAUD_TO_TRY for term in READ_TERM_TO_TRY]
+
+    if resource_timeout is not None:
+        deadline = time.monotonic() + resource_timeout
+    answered = False
+    for baud, term in probe_order:
+        if resource_timeout is not None and time.monotonic() > deadline:
+            print(f"Gave up probing {device} after {resource_timeout}s")
+            break
+        try:
+            device.baud_rate = baud
+            device.read_termination = term
+            identity = device.query(cmds.SCPI_IDENTIFY)
+            answered = True
+            interface = get_interface_by_identity(identity)
+            if interface:
+                device.timeout = DEFAULT_TIMEOUT_MS
+                if cache is not None:
+                    cache.update(resource_name, baud, term, identity, interface.__name__)
+                if history is not None:
+                    history.record_hit(resource_name, baud, term)
+                return identity, interface(resource=device)
+            _flush_device(device)
+        except VisaIOError:
+            _flush_device(device)
+
+    if history is not None:
+        if answered:
+            history.record_answered(resource_name)
+        else:
+            history.record_silent(resource_name)
+    return None
+
+
+def find_device_interface(devices, max_workers=None, resource_timeout=None, cache=None,
+                          history=None):
+    """
+    Probes the given resources concurrently, each resource in its own worker
+    so the scan takes as long as the slowest port rather than the sum of all.
+    """
     print(f"Scanning through {devices} via various bauds and terminators")
-    # in order of most to least likely. 
-    baud_to_try = [9600, 115200, 19200, 57600, 38400, 4800, 2400, 1200, 600, 300]
-    read_term_to_try = ['\n', '\r', '\r\n']  
     supported_devices = {}
-    for device in devices:
-        device.timeout = 200  # Reduce timeout to reduce time this takes (ms)
-        interface = None
-        for baud in baud_to_try:    
-            if interface is not None:
-                break  # No clean way of moving to next loop. 
-            for term in read_term_to_try:
-                try:
-                    device.baud_rate = baud
-                    device.read_termination = term                
-                    identity = device.query(cmds.SCPI_IDENTIFY)                    
-                    interface = get_interface_by_identity(identity)                    
-                    if interface:
-                        device.timeout = 2000 # Default
-                        supported_devices[identity] = interface(resource=device)
-                        break
-                    device.flush(pyvisa.constants.VI_READ_BUF)
-                    device.flush(pyvisa.constants.VI_WRITE_BUF)
-                except VisaIOError:
-                    device.flush(pyvisa.constants.VI_READ_BUF)
-                    device.flush(pyvisa.constants.VI_WRITE_BUF)
+    if not devices:
+        return supported_devices
+    if max_workers is None:
+        max_workers = min(MAX_SCAN_WORKERS, len(devices))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda device: probe_device(device, resource_timeout, cache, history), devices)
+        for device, result in zip(devices, results):
+            if result is not None:
+                identity, interface = result
+                supported_devices[identity] = interface
+            else:
+                # Nothing claimed this session, hand it back to the pool.
+                close_resource(device.resource_name)
 
     return supported_devices
-
-
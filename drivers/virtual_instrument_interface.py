@@ -2,6 +2,8 @@ from enum import Enum
 from multiprocessing import connection
 import time
 from statistics import mean
+from .async_interface import AsyncInterfaceMixin, AsyncPSUBaseMixin, AsyncDMMBaseMixin, AsyncLoadBaseMixin
+from .command_queue import serialised
 
 # TODO: make this configurable, maybe env variable?
 ADDRESS = '/tmp/ATE.socket'
@@ -71,7 +73,7 @@ def _chan_to_int(chan):
     return int(chan) if chan is not None else None
 
 
-class VirtualInterface:
+class VirtualInterface(AsyncInterfaceMixin):
     _model = "NotSet"
     _type = 0
     _connection = None
@@ -81,6 +83,7 @@ class VirtualInterface:
         if self._type:
             self._connect(self._type, serial)
 
+    @serialised
     def _connect(self, _type, serial=None):
         if self._connection:
             self._connection.close()
@@ -93,6 +96,7 @@ class VirtualInterface:
             t = int(_type)
         self._query([0, t, serial])
 
+    @serialised
     def _query(self, cmd, min_reply_length=0, timeout=1.0):
         result = None
         if self._connection:
@@ -110,7 +114,7 @@ class VirtualInterface:
         return result[1:]
 
 
-class VirtualPSUInterface(VirtualInterface):
+class VirtualPSUInterface(VirtualInterface, AsyncPSUBaseMixin):
     _type = VirtualInstrumetType.PSU
 
     def get_current(self, chan=None):
@@ -138,7 +142,7 @@ class VirtualPSUInterface(VirtualInterface):
         self._query([VirtualPSUCommands.ENABLE.value, _chan_to_int(chan), False])
 
 
-class VirtualDMMInterface(VirtualInterface):
+class VirtualDMMInterface(VirtualInterface, AsyncDMMBaseMixin):
     _type = VirtualInstrumetType.DMM
 
     def get_voltage_dc(self, chan):
@@ -159,7 +163,7 @@ class VirtualDMMInterface(VirtualInterface):
         pass
 
 
-class VirtualLoadInterface(VirtualInterface):
+class VirtualLoadInterface(VirtualInterface, AsyncLoadBaseMixin):
     _type = VirtualInstrumetType.LOAD
 
     def set_mode_current(self):
@@ -300,6 +304,7 @@ class VirtualAardvarkInterface(VirtualInterface):
             self._connect(self._type_list[t], self._serial)
             self._active_type = self._type_list[t]
 
+    @serialised
     def i2c_write_read(self, slave_addr, data_out, num_bytes_read, delay_ms):
         self._configure("i2c")
         # Command number sent is "1", not sure if there is any use for more commands, but keep it there for possible
@@ -311,14 +316,17 @@ class VirtualAardvarkInterface(VirtualInterface):
                                      int(slave_addr), data_out, int(num_bytes_read)], 2)[0:2]
         return (len(reply), reply)
 
+    @serialised
     def gpio_set_output(self, chan, value):
         self._configure("gpio")
         self._query([VirtualGPIOCommands.SET_OUTPUT.value, _chan_to_int(chan), bool(value)])
 
+    @serialised
     def gpio_set_input(self, chan, pull_up):
         self._configure("gpio")
         self._query([VirtualGPIOCommands.SET_INPUT.value, _chan_to_int(chan), bool(pull_up)])
 
+    @serialised
     def gpio_read_input(self, chan):
         self._configure("gpio")
         return self._query([VirtualGPIOCommands.GET_VALUE.value, _chan_to_int(chan)], 1)[0]